@@ -83,7 +83,8 @@ class DeepSeekChatOpenAI(ChatOpenAI):
 
 from prompts.agent_prompt import STOP_SIGNAL, get_agent_system_prompt
 from tools.general_tools import (extract_conversation, extract_tool_messages,
-                                 get_config_value, write_config_value)
+                                 get_config_value, with_runtime_env_headers,
+                                 write_config_value, write_config_values)
 from tools.price_tools import add_no_trade_record
 
 # Load environment variables
@@ -249,7 +250,7 @@ class BaseAgent:
         if stock_symbols is None:
             if market == "cn":
                 # Import A-shares symbols when needed
-                from prompts.agent_prompt import all_sse_50_symbols
+                from prompts.symbols import all_sse_50_symbols
 
                 self.stock_symbols = all_sse_50_symbols
             else:
@@ -265,7 +266,8 @@ class BaseAgent:
         self.init_date = init_date
 
         # Set MCP configuration
-        self.mcp_config = mcp_config or self._get_default_mcp_config()
+        # MCP requests carry this run's runtime env file when one is set (see main.py)
+        self.mcp_config = with_runtime_env_headers(mcp_config or self._get_default_mcp_config())
 
         # Set log path
         self.base_log_path = log_path or "./data/agent_data"
@@ -431,7 +433,7 @@ class BaseAgent:
         self.agent = create_agent(
             self.model,
             tools=self.tools,
-            system_prompt=get_agent_system_prompt(today_date, self.signature, self.market, self.stock_symbols),
+            system_prompt=await get_agent_system_prompt(today_date, self.signature, self.market, self.stock_symbols),
         )
 
         # Initial user query
@@ -538,7 +540,7 @@ class BaseAgent:
         Returns:
             List of trading dates (excluding weekends and holidays)
         """
-        from tools.price_tools import is_trading_day
+        from tools.price_tools import get_trading_day_set
 
         dates = []
         max_date = None
@@ -570,11 +572,12 @@ class BaseAgent:
         # Generate trading date list, filtered by actual trading days
         trading_dates = []
         current_date = max_date_obj + timedelta(days=1)
+        trading_days = get_trading_day_set(market=self.market)
 
         while current_date <= end_date_obj:
             date_str = current_date.strftime("%Y-%m-%d")
             # Check if this is an actual trading day in merged.jsonl
-            if is_trading_day(date_str, market=self.market):
+            if date_str in trading_days:
                 trading_dates.append(date_str)
             current_date += timedelta(days=1)
 
@@ -622,8 +625,7 @@ class BaseAgent:
             print(f"🔄 Processing {self.signature} - Date: {date}")
 
             # Set configuration
-            write_config_value("TODAY_DATE", date)
-            write_config_value("SIGNATURE", self.signature)
+            write_config_values({"TODAY_DATE": date, "SIGNATURE": self.signature})
 
             try:
                 await self.run_with_retry(date)
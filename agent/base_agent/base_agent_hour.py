@@ -20,7 +20,7 @@ import sys
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.insert(0, project_root)
 
-from tools.general_tools import extract_conversation, extract_tool_messages, get_config_value, write_config_value
+from tools.general_tools import extract_conversation, extract_tool_messages, get_config_value, write_config_value, write_config_values
 from tools.price_tools import add_no_trade_record
 from prompts.agent_prompt import get_agent_system_prompt, STOP_SIGNAL
 
@@ -57,7 +57,7 @@ class BaseAgent_Hour(BaseAgent):
         self.agent = create_agent(
             self.model,
             tools=self.tools,
-            system_prompt=get_agent_system_prompt(today_date, self.signature),
+            system_prompt=await get_agent_system_prompt(today_date, self.signature),
         )
         
         # Initial user query
@@ -261,8 +261,7 @@ class BaseAgent_Hour(BaseAgent):
             print(f"🔄 Processing {self.signature} - Date: {date}")
             
             # Set configuration
-            write_config_value("TODAY_DATE", date)
-            write_config_value("SIGNATURE", self.signature)
+            write_config_values({"TODAY_DATE": date, "SIGNATURE": self.signature})
             
             try:
                 await self.run_with_retry(date)
@@ -18,6 +18,7 @@ except ImportError:
     HAVE_FCNTL = False
 from pathlib import Path
 
+import pytz
 from langchain_mcp_adapters.client import MultiServerMCPClient
 from langchain_openai import ChatOpenAI
 from langchain.agents import create_agent
@@ -28,16 +29,19 @@ import sys
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.insert(0, project_root)
 
-from tools.general_tools import extract_conversation, extract_tool_messages, get_config_value, write_config_value
-from tools.price_tools import add_no_trade_record
+from tools.general_tools import extract_conversation, extract_tool_messages, get_config_value, write_config_value, write_config_values
+from tools.price_tools import FormattedBarRing, add_no_trade_record
 from tools.bar_cache_manager import BarCacheManager
-from prompts.agent_prompt_5min import get_intraday_agent_system_prompt, STOP_SIGNAL
+from prompts.agent_prompt_5min import MAX_PROMPT_BARS, get_intraday_agent_system_prompt, STOP_SIGNAL
 
 # Load environment variables
 load_dotenv()
 
 from agent.base_agent.base_agent import BaseAgent
 
+# US market timezone, resolved once for all ET clock reads
+ET_TZ = pytz.timezone("US/Eastern")
+
 
 class BaseAgent_5Min(BaseAgent):
     """
@@ -88,6 +92,9 @@ class BaseAgent_5Min(BaseAgent):
         self.trading_symbols = stock_symbols if not trading_symbol else [trading_symbol]
         self.trading_symbol = self.trading_symbols[0]  # For backward compatibility
         self.live_mode = live_mode
+
+        # Per-symbol (today, yesterday) formatted bar windows reused across ticks
+        self._bar_rings: Dict[str, tuple] = {}
         
         # Initialize bar cache manager
         cache_dir = os.path.join(project_root, "data", "price_cache_5min")
@@ -125,6 +132,10 @@ class BaseAgent_5Min(BaseAgent):
         # Import the prompt function with bars
         from prompts.agent_prompt_5min import get_intraday_agent_system_prompt_with_bars
         
+        today_ring, yesterday_ring = self._bar_rings.setdefault(
+            self.trading_symbol, (FormattedBarRing(max_bars=MAX_PROMPT_BARS), FormattedBarRing(max_bars=MAX_PROMPT_BARS))
+        )
+        
         # Update system prompt with intraday-specific prompt including cached bar data
         from langchain.agents import create_agent
         self.agent = create_agent(
@@ -136,7 +147,9 @@ class BaseAgent_5Min(BaseAgent):
                 self.trading_symbol,
                 today_bars,
                 yesterday_bars,
-                self.market
+                self.market,
+                today_ring=today_ring,
+                yesterday_ring=yesterday_ring
             ),
         )
         
@@ -290,8 +303,7 @@ class BaseAgent_5Min(BaseAgent):
             print(f"\n🔄 Processing {self.signature} - Interval {idx}/{len(trading_times)}: {trade_time}")
             
             # Set configuration
-            write_config_value("TODAY_DATE", trade_time)
-            write_config_value("SIGNATURE", self.signature)
+            write_config_values({"TODAY_DATE": trade_time, "SIGNATURE": self.signature})
             
             try:
                 await self.run_with_retry(trade_time)
@@ -341,9 +353,7 @@ class BaseAgent_5Min(BaseAgent):
             f.write(json.dumps(initial_position) + "\n")
         
         # Save agent metadata for frontend auto-detection
-        import pytz
-        et_tz = pytz.timezone('US/Eastern')
-        start_time_et = datetime.now(et_tz)
+        start_time_et = datetime.now(ET_TZ)
         start_time_iso = start_time_et.strftime("%Y-%m-%dT%H:%M:%S%z")
         start_time_iso = start_time_iso[:-2] + ":" + start_time_iso[-2:]
 
@@ -502,9 +512,6 @@ class BaseAgent_5Min(BaseAgent):
         Calculate seconds until the next regular US market open (09:30 ET).
         Weekends are skipped; holidays fall back to the next weekday at 09:30.
         """
-        import pytz
-
-        et_tz = pytz.timezone('US/Eastern')
         calendar = getattr(self.cache_manager, "_alpaca_calendar", None)
 
         # Same-day open if before 9:30 AM ET on a weekday
@@ -520,7 +527,7 @@ class BaseAgent_5Min(BaseAgent):
                 )
                 for entry in sorted_entries:
                     entry_date = datetime.strptime(entry["date"], "%Y-%m-%d")
-                    open_dt = et_tz.localize(datetime.combine(entry_date, time(9, 30)))
+                    open_dt = ET_TZ.localize(datetime.combine(entry_date, time(9, 30)))
                     if open_dt > current_time_et:
                         return max((open_dt - current_time_et).total_seconds(), 0.0)
             except Exception:
@@ -539,13 +546,9 @@ class BaseAgent_5Min(BaseAgent):
         Check if market is currently open
         US Market: 9:30 AM - 4:00 PM ET, Monday-Friday
         """
-        from datetime import timezone
-        import pytz
-        
         # Get current time in ET
         try:
-            et_tz = pytz.timezone('US/Eastern')
-            now_et = datetime.now(et_tz)
+            now_et = datetime.now(ET_TZ)
         except:
             # Fallback: assume system time + 3 hours (PST to EST)
             now = datetime.now()
@@ -588,9 +591,7 @@ class BaseAgent_5Min(BaseAgent):
         try:
             while True:
                 # ALWAYS use ET (Eastern Time) for stock operations
-                import pytz
-                et_tz = pytz.timezone('US/Eastern')
-                current_time_et = datetime.now(et_tz)
+                current_time_et = datetime.now(ET_TZ)
                 # Format as ISO 8601 with timezone for proper frontend parsing
                 current_time_str = current_time_et.strftime("%Y-%m-%dT%H:%M:%S%z")
                 # Insert colon in timezone (e.g., -0500 -> -05:00)
@@ -624,8 +625,7 @@ class BaseAgent_5Min(BaseAgent):
                 # Set configuration
                 # TODAY_DATE is in ET (Eastern Time) - standard for US stock market
                 # Frontend will convert to user's local timezone for display
-                write_config_value("TODAY_DATE", current_time_str)
-                write_config_value("SIGNATURE", self.signature)
+                write_config_values({"TODAY_DATE": current_time_str, "SIGNATURE": self.signature})
                 
                 try:
                     # Run trading session for current time
@@ -642,7 +642,7 @@ class BaseAgent_5Min(BaseAgent):
                     current_time_et.replace(second=0, microsecond=0)
                     + timedelta(minutes=5)
                 )
-                now = datetime.now(et_tz)
+                now = datetime.now(ET_TZ)
                 if now >= next_tick:
                     # If we're already past the boundary (due to delays), move to future slot
                     minutes_ahead = ((now.minute // 5) + 1) * 5
@@ -85,7 +85,8 @@ class DeepSeekChatOpenAI(ChatOpenAI):
 from prompts.agent_prompt_astock import (STOP_SIGNAL,
                                          get_agent_system_prompt_astock)
 from tools.general_tools import (extract_conversation, extract_tool_messages,
-                                 get_config_value, write_config_value)
+                                 get_config_value, with_runtime_env_headers,
+                                 write_config_value, write_config_values)
 from tools.price_tools import add_no_trade_record
 
 # Load environment variables
@@ -210,7 +211,8 @@ class BaseAgentAStock:
         self.init_date = init_date
 
         # Set MCP configuration
-        self.mcp_config = mcp_config or self._get_default_mcp_config()
+        # MCP requests carry this run's runtime env file when one is set (see main.py)
+        self.mcp_config = with_runtime_env_headers(mcp_config or self._get_default_mcp_config())
 
         # Set log path - A股专用路径
         self.base_log_path = log_path or "./data/agent_data_astock"
@@ -478,7 +480,7 @@ class BaseAgentAStock:
         Returns:
             List of trading dates (excluding weekends and holidays)
         """
-        from tools.price_tools import is_trading_day
+        from tools.price_tools import get_trading_day_set
 
         dates = []
         max_date = None
@@ -510,11 +512,12 @@ class BaseAgentAStock:
         # Generate trading date list, filtered by actual trading days (A-shares market)
         trading_dates = []
         current_date = max_date_obj + timedelta(days=1)
+        trading_days = get_trading_day_set(market="cn")
 
         while current_date <= end_date_obj:
             date_str = current_date.strftime("%Y-%m-%d")
             # Check if this is an actual trading day in A-shares market
-            if is_trading_day(date_str, market="cn"):
+            if date_str in trading_days:
                 trading_dates.append(date_str)
             current_date += timedelta(days=1)
 
@@ -562,8 +565,7 @@ class BaseAgentAStock:
             print(f"🔄 Processing {self.signature} - Date: {date}")
 
             # Set configuration
-            write_config_value("TODAY_DATE", date)
-            write_config_value("SIGNATURE", self.signature)
+            write_config_values({"TODAY_DATE": date, "SIGNATURE": self.signature})
 
             try:
                 await self.run_with_retry(date)
@@ -13,6 +13,7 @@ from datetime import datetime, timedelta
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from tools.general_tools import get_config_value
+from tools.mcp_runtime_env import RuntimeEnvMiddleware
 
 logger = logging.getLogger(__name__)
 
@@ -217,6 +218,8 @@ class AlphaVantageNewsTool:
 
 
 mcp = FastMCP("Search")
+# Each call uses the calling agent's runtime env file (SIGNATURE, TODAY_DATE, ...)
+mcp.add_middleware(RuntimeEnvMiddleware())
 
 
 @mcp.tool()
@@ -1,3 +1,4 @@
+import heapq
 import json
 import os
 import sys
@@ -21,6 +22,10 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from tools.general_tools import get_config_value
+from tools.mcp_runtime_env import RuntimeEnvMiddleware
+
+# Each call uses the calling agent's runtime env file (SIGNATURE, TODAY_DATE, ...)
+mcp.add_middleware(RuntimeEnvMiddleware())
 
 
 def _workspace_data_path(filename: str, symbol: Optional[str] = None) -> Path:
@@ -126,7 +131,7 @@ def get_price_local_daily(symbol: str, date: str) -> Dict[str, Any]:
             series = doc.get("Time Series (Daily)", {})
             day = series.get(date)
             if day is None:
-                sample_dates = sorted(series.keys(), reverse=True)[:5]
+                sample_dates = heapq.nlargest(5, series)
                 return {
                     "error": f"Data not found for date {date}. Please verify the date exists in data. Sample available dates: {sample_dates}",
                     "symbol": symbol,
@@ -192,7 +197,7 @@ def get_price_local_hourly(symbol: str, date: str) -> Dict[str, Any]:
             series = doc.get("Time Series (60min)", {})
             day = series.get(date)
             if day is None:
-                sample_dates = sorted(series.keys(), reverse=True)[:5]
+                sample_dates = heapq.nlargest(5, series)
                 return {
                     "error": f"Data not found for date {date}. Please verify the date exists in data. Sample available dates: {sample_dates}",
                     "symbol": symbol,
@@ -257,7 +262,7 @@ def get_price_local_function(symbol: str, date: str, filename: str = "merged.jso
             series = doc.get("Time Series (Daily)", {})
             day = series.get(date)
             if day is None:
-                sample_dates = sorted(series.keys(), reverse=True)[:5]
+                sample_dates = heapq.nlargest(5, series)
                 return {
                     "error": f"Data not found for date {date}. Please verify the date exists in data. Sample available dates: {sample_dates}",
                     "symbol": symbol,
@@ -16,6 +16,7 @@ from datetime import datetime, timedelta
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from tools.general_tools import get_config_value
+from tools.mcp_runtime_env import RuntimeEnvMiddleware
 
 logger = logging.getLogger(__name__)
 
@@ -211,6 +212,8 @@ class WebScrapingJinaTool:
 
 
 mcp = FastMCP("Search")
+# Each call uses the calling agent's runtime env file (SIGNATURE, TODAY_DATE, ...)
+mcp.add_middleware(RuntimeEnvMiddleware())
 
 
 @mcp.tool()
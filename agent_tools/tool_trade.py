@@ -12,13 +12,89 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 import json
 
+import requests
+
 from tools.general_tools import get_config_value, write_config_value
+from tools.mcp_runtime_env import RuntimeEnvMiddleware
 from tools.price_tools import (get_latest_position, get_open_prices,
                                get_yesterday_date,
                                get_yesterday_open_and_close_price,
                                get_yesterday_profit)
 
 mcp = FastMCP("TradeTools")
+# Each call uses the calling agent's runtime env file (SIGNATURE, TODAY_DATE, ...)
+mcp.add_middleware(RuntimeEnvMiddleware())
+
+# Alpaca market data endpoint and auth headers for intraday price lookups.
+# Credentials are read once (general_tools has already loaded .env at import).
+_ALPACA_DATA_URL = "https://data.alpaca.markets"
+_ALPACA_HEADERS = {
+    "APCA-API-KEY-ID": os.getenv("ALPACA_API_KEY"),
+    "APCA-API-SECRET-KEY": os.getenv("ALPACA_API_SECRET"),
+}
+_LATEST_BAR_PARAMS = {"feed": "iex"}
+
+# Compact separators for position.jsonl records (no padding spaces)
+_JSON_SEPARATORS = (",", ":")
+
+# Symbol suffixes that identify Chinese A-shares (Shanghai / Shenzhen exchanges)
+_CN_SUFFIX = (".SH", ".SZ")
+
+
+def _trade_error(message: str, symbol: str, today_date: str, **details: Any) -> Dict[str, Any]:
+    """
+    Build the error dictionary returned by trade tools.
+
+    Args:
+        message: Human-readable error message
+        symbol: Stock symbol of the rejected trade
+        today_date: Trading date
+        **details: Extra context fields (e.g. amount, required_cash)
+
+    Returns:
+        Dict[str, Any]: {"error": message, "symbol": symbol, ..., "date": today_date}
+    """
+    return dict(error=message, symbol=symbol, **details, date=today_date)
+
+
+def _preflight(action: str, symbol: str, amount: int, today_date: str):
+    """
+    Validate trade amount and detect market type before touching positions.
+
+    Args:
+        action: Trade action name ("buy", "sell" or "short"), used in error messages
+        symbol: Stock symbol
+        amount: Requested trade quantity
+        today_date: Trading date
+
+    Returns:
+        Tuple of (market, error): market is "cn" or "us" when validation passes,
+        otherwise market is None and error is the error dictionary to return.
+    """
+    # Validate amount is positive
+    if amount <= 0:
+        return None, _trade_error(
+            f"{action.capitalize()} amount must be positive! You tried to {action} {amount} shares.",
+            symbol,
+            today_date,
+            amount=amount,
+        )
+
+    # Auto-detect market type based on symbol format
+    market = "cn" if symbol.endswith(_CN_SUFFIX) else "us"
+
+    # 🇨🇳 Chinese A-shares trading rule: Must trade in lots of 100 shares (一手 = 100股)
+    if market == "cn" and amount % 100:
+        return None, _trade_error(
+            f"Chinese A-shares must be traded in multiples of 100 shares (1 lot = 100 shares). You tried to {action} {amount} shares.",
+            symbol,
+            today_date,
+            amount=amount,
+            suggestion=f"Please use {(amount // 100) * 100} or {((amount // 100) + 1) * 100} shares instead.",
+        )
+
+    return market, None
+
 
 def _position_lock(signature: str):
     """Context manager for file-based lock to serialize position updates per signature."""
@@ -81,27 +157,10 @@ def buy(symbol: str, amount: int) -> Dict[str, Any]:
     # Get current trading date from environment variable
     today_date = get_config_value("TODAY_DATE")
 
-    # Validate amount is positive
-    if amount <= 0:
-        return {
-            "error": f"Buy amount must be positive! You tried to buy {amount} shares.",
-            "symbol": symbol,
-            "amount": amount,
-            "date": today_date,
-        }
-
-    # Auto-detect market type based on symbol format
-    market = "cn" if symbol.endswith((".SH", ".SZ")) else "us"
-
-    # 🇨🇳 Chinese A-shares trading rule: Must trade in lots of 100 shares (一手 = 100股)
-    if market == "cn" and amount % 100 != 0:
-        return {
-            "error": f"Chinese A-shares must be traded in multiples of 100 shares (1 lot = 100 shares). You tried to buy {amount} shares.",
-            "symbol": symbol,
-            "amount": amount,
-            "date": today_date,
-            "suggestion": f"Please use {(amount // 100) * 100} or {((amount // 100) + 1) * 100} shares instead.",
-        }
+    # Validate amount and lot size, detect market type
+    market, error = _preflight("buy", symbol, amount, today_date)
+    if error is not None:
+        return error
 
     # Step 2: Get current latest position and operation ID
     # get_latest_position returns two values: position dictionary and current maximum operation ID
@@ -113,25 +172,15 @@ def buy(symbol: str, amount: int) -> Dict[str, Any]:
         except Exception as e:
             print(e)
             print(today_date, signature)
-            return {"error": f"Failed to load latest position: {e}", "symbol": symbol, "date": today_date}
+            return _trade_error(f"Failed to load latest position: {e}", symbol, today_date)
     # Step 3: Get stock opening price for the day
     # For 5-minute intraday trading (has time component), use Alpaca API for latest price
     # For daily trading, use get_open_prices from local files
     try:
         if 'T' in today_date or (' ' in today_date and len(today_date) > 10):
             # Intraday 5-minute trading - use Alpaca API to get latest price
-            import requests
-            alpaca_api_key = os.getenv("ALPACA_API_KEY")
-            alpaca_api_secret = os.getenv("ALPACA_API_SECRET")
-            
-            url = f"https://data.alpaca.markets/v2/stocks/{symbol}/bars/latest"
-            headers = {
-                "APCA-API-KEY-ID": alpaca_api_key,
-                "APCA-API-SECRET-KEY": alpaca_api_secret,
-            }
-            params = {"feed": "iex"}
-            
-            response = requests.get(url, headers=headers, params=params)
+            url = f"{_ALPACA_DATA_URL}/v2/stocks/{symbol}/bars/latest"
+            response = requests.get(url, headers=_ALPACA_HEADERS, params=_LATEST_BAR_PARAMS)
             if response.status_code == 200:
                 data = response.json()
                 bar = data.get("bar", {})
@@ -146,11 +195,11 @@ def buy(symbol: str, amount: int) -> Dict[str, Any]:
             this_symbol_price = get_open_prices(today_date, [symbol], market=market)[f"{symbol}_price"]
     except KeyError:
         # Stock symbol does not exist or price data is missing, return error message
-        return {
-            "error": f"Symbol {symbol} not found! This action will not be allowed.",
-            "symbol": symbol,
-            "date": today_date,
-        }
+        return _trade_error(
+            f"Symbol {symbol} not found! This action will not be allowed.",
+            symbol,
+            today_date,
+        )
 
     # Step 4: Validate buy conditions
     current_shares = current_position.get(symbol, 0)
@@ -167,13 +216,13 @@ def buy(symbol: str, amount: int) -> Dict[str, Any]:
 
     # Check if cash balance is sufficient
     if cash_left < 0:
-        return {
-            "error": "Insufficient cash! This action will not be allowed.",
-            "required_cash": cash_required,
-            "cash_available": current_position.get("CASH", 0),
-            "symbol": symbol,
-            "date": today_date,
-        }
+        return _trade_error(
+            "Insufficient cash! This action will not be allowed.",
+            symbol,
+            today_date,
+            required_cash=cash_required,
+            cash_available=current_position.get("CASH", 0),
+        )
     
     # Check for reasonable position size limits (prevent unrealistic trades)
     # Maximum long position is limited by available cash (natural limit)
@@ -206,20 +255,17 @@ def buy(symbol: str, amount: int) -> Dict[str, Any]:
     position_file_path = os.path.join(project_root, "data", log_path, signature, "position", "position.jsonl")
     with open(position_file_path, "a") as f:
         # Write JSON format transaction record, containing date, operation ID, transaction details and updated position
-        print(
-            f"Writing to position.jsonl: {json.dumps({'date': today_date, 'id': current_action_id + 1, 'this_action':{'action':'buy','symbol':symbol,'amount':amount},'positions': new_position})}"
-        )
-        f.write(
-            json.dumps(
-                {
-                    "date": today_date,
-                    "id": current_action_id + 1,
-                    "this_action": {"action": "buy", "symbol": symbol, "amount": amount},
-                    "positions": new_position,
-                }
-            )
-            + "\n"
+        record = json.dumps(
+            {
+                "date": today_date,
+                "id": current_action_id + 1,
+                "this_action": {"action": "buy", "symbol": symbol, "amount": amount},
+                "positions": new_position,
+            },
+            separators=_JSON_SEPARATORS,
         )
+        print(f"Writing to position.jsonl: {record}")
+        f.write(record + "\n")
     # Step 7: Return updated position
     write_config_value("IF_TRADE", True)
     print("IF_TRADE", get_config_value("IF_TRADE"))
@@ -304,27 +350,10 @@ def sell(symbol: str, amount: int) -> Dict[str, Any]:
     # Get current trading date from environment variable
     today_date = get_config_value("TODAY_DATE")
 
-    # Validate amount is positive
-    if amount <= 0:
-        return {
-            "error": f"Sell amount must be positive! You tried to sell {amount} shares.",
-            "symbol": symbol,
-            "amount": amount,
-            "date": today_date,
-        }
-
-    # Auto-detect market type based on symbol format
-    market = "cn" if symbol.endswith((".SH", ".SZ")) else "us"
-
-    # 🇨🇳 Chinese A-shares trading rule: Must trade in lots of 100 shares (一手 = 100股)
-    if market == "cn" and amount % 100 != 0:
-        return {
-            "error": f"Chinese A-shares must be traded in multiples of 100 shares (1 lot = 100 shares). You tried to sell {amount} shares.",
-            "symbol": symbol,
-            "amount": amount,
-            "date": today_date,
-            "suggestion": f"Please use {(amount // 100) * 100} or {((amount // 100) + 1) * 100} shares instead.",
-        }
+    # Validate amount and lot size, detect market type
+    market, error = _preflight("sell", symbol, amount, today_date)
+    if error is not None:
+        return error
 
     # Step 2: Get current latest position and operation ID
     # get_latest_position returns two values: position dictionary and current maximum operation ID
@@ -337,18 +366,8 @@ def sell(symbol: str, amount: int) -> Dict[str, Any]:
     try:
         if 'T' in today_date or (' ' in today_date and len(today_date) > 10):
             # Intraday 5-minute trading - use Alpaca API to get latest price
-            import requests
-            alpaca_api_key = os.getenv("ALPACA_API_KEY")
-            alpaca_api_secret = os.getenv("ALPACA_API_SECRET")
-            
-            url = f"https://data.alpaca.markets/v2/stocks/{symbol}/bars/latest"
-            headers = {
-                "APCA-API-KEY-ID": alpaca_api_key,
-                "APCA-API-SECRET-KEY": alpaca_api_secret,
-            }
-            params = {"feed": "iex"}
-            
-            response = requests.get(url, headers=headers, params=params)
+            url = f"{_ALPACA_DATA_URL}/v2/stocks/{symbol}/bars/latest"
+            response = requests.get(url, headers=_ALPACA_HEADERS, params=_LATEST_BAR_PARAMS)
             if response.status_code == 200:
                 data = response.json()
                 bar = data.get("bar", {})
@@ -363,11 +382,11 @@ def sell(symbol: str, amount: int) -> Dict[str, Any]:
             this_symbol_price = get_open_prices(today_date, [symbol], market=market)[f"{symbol}_price"]
     except KeyError:
         # Stock symbol does not exist or price data is missing, return error message
-        return {
-            "error": f"Symbol {symbol} not found! This action will not be allowed.",
-            "symbol": symbol,
-            "date": today_date,
-        }
+        return _trade_error(
+            f"Symbol {symbol} not found! This action will not be allowed.",
+            symbol,
+            today_date,
+        )
 
     # Step 4: Validate sell conditions
     # Get current position for this symbol (default to 0 if not present)
@@ -378,39 +397,39 @@ def sell(symbol: str, amount: int) -> Dict[str, Any]:
     if current_shares < 0:
         # Closing a short position - check if we have enough short shares to close
         if abs(current_shares) < amount:
-            return {
-                "error": f"Insufficient short position to close! You have {abs(current_shares)} shares short, but trying to close {amount}.",
-                "have": current_shares,
-                "want_to_close": amount,
-                "symbol": symbol,
-                "date": today_date,
-            }
+            return _trade_error(
+                f"Insufficient short position to close! You have {abs(current_shares)} shares short, but trying to close {amount}.",
+                symbol,
+                today_date,
+                have=current_shares,
+                want_to_close=amount,
+            )
         # Also check if we have enough cash to buy back the shares
         cash_required = this_symbol_price * amount
         if current_position.get("CASH", 0) < cash_required:
-            return {
-                "error": f"Insufficient cash to close short position! Need ${cash_required:.2f} but only have ${current_position.get('CASH', 0):.2f}.",
-                "required_cash": cash_required,
-                "cash_available": current_position.get("CASH", 0),
-                "symbol": symbol,
-                "date": today_date,
-            }
+            return _trade_error(
+                f"Insufficient cash to close short position! Need ${cash_required:.2f} but only have ${current_position.get('CASH', 0):.2f}.",
+                symbol,
+                today_date,
+                required_cash=cash_required,
+                cash_available=current_position.get("CASH", 0),
+            )
     elif current_shares == 0:
         # No position - cannot sell (use short() function to open a short position)
-        return {
-            "error": f"No position for {symbol}! To open a short position, use the short() function instead.",
-            "symbol": symbol,
-            "date": today_date,
-        }
+        return _trade_error(
+            f"No position for {symbol}! To open a short position, use the short() function instead.",
+            symbol,
+            today_date,
+        )
     elif current_shares < amount:
         # Long position but insufficient shares
-        return {
-            "error": "Insufficient shares! This action will not be allowed.",
-            "have": current_shares,
-            "want_to_sell": amount,
-            "symbol": symbol,
-            "date": today_date,
-        }
+        return _trade_error(
+            "Insufficient shares! This action will not be allowed.",
+            symbol,
+            today_date,
+            have=current_shares,
+            want_to_sell=amount,
+        )
 
     # 🇨🇳 Chinese A-shares T+1 trading rule: Cannot sell shares bought on the same day
     if market == "cn":
@@ -419,15 +438,15 @@ def sell(symbol: str, amount: int) -> Dict[str, Any]:
             # Calculate sellable quantity (total position - bought today)
             sellable_amount = current_position[symbol] - bought_today
             if amount > sellable_amount:
-                return {
-                    "error": f"T+1 restriction violated! You bought {bought_today} shares of {symbol} today and cannot sell them until tomorrow.",
-                    "symbol": symbol,
-                    "total_position": current_position[symbol],
-                    "bought_today": bought_today,
-                    "sellable_today": max(0, sellable_amount),
-                    "want_to_sell": amount,
-                    "date": today_date,
-                }
+                return _trade_error(
+                    f"T+1 restriction violated! You bought {bought_today} shares of {symbol} today and cannot sell them until tomorrow.",
+                    symbol,
+                    today_date,
+                    total_position=current_position[symbol],
+                    bought_today=bought_today,
+                    sellable_today=max(0, sellable_amount),
+                    want_to_sell=amount,
+                )
 
     # Step 5: Execute sell operation, update position
     # Create a copy of current position to avoid directly modifying original data
@@ -456,20 +475,17 @@ def sell(symbol: str, amount: int) -> Dict[str, Any]:
     position_file_path = os.path.join(project_root, "data", log_path, signature, "position", "position.jsonl")
     with open(position_file_path, "a") as f:
         # Write JSON format transaction record, containing date, operation ID and updated position
-        print(
-            f"Writing to position.jsonl: {json.dumps({'date': today_date, 'id': current_action_id + 1, 'this_action':{'action':'sell','symbol':symbol,'amount':amount},'positions': new_position})}"
-        )
-        f.write(
-            json.dumps(
-                {
-                    "date": today_date,
-                    "id": current_action_id + 1,
-                    "this_action": {"action": "sell", "symbol": symbol, "amount": amount},
-                    "positions": new_position,
-                }
-            )
-            + "\n"
+        record = json.dumps(
+            {
+                "date": today_date,
+                "id": current_action_id + 1,
+                "this_action": {"action": "sell", "symbol": symbol, "amount": amount},
+                "positions": new_position,
+            },
+            separators=_JSON_SEPARATORS,
         )
+        print(f"Writing to position.jsonl: {record}")
+        f.write(record + "\n")
 
     # Step 7: Return updated position
     write_config_value("IF_TRADE", True)
@@ -514,27 +530,10 @@ def short(symbol: str, amount: int) -> Dict[str, Any]:
 
     today_date = get_config_value("TODAY_DATE")
 
-    # Validate amount is positive
-    if amount <= 0:
-        return {
-            "error": f"Short amount must be positive! You tried to short {amount} shares.",
-            "symbol": symbol,
-            "amount": amount,
-            "date": today_date,
-        }
-
-    # Auto-detect market type
-    market = "cn" if symbol.endswith((".SH", ".SZ")) else "us"
-
-    # 🇨🇳 Chinese A-shares trading rule: Must trade in lots of 100 shares
-    if market == "cn" and amount % 100 != 0:
-        return {
-            "error": f"Chinese A-shares must be traded in multiples of 100 shares (1 lot = 100 shares). You tried to short {amount} shares.",
-            "symbol": symbol,
-            "amount": amount,
-            "date": today_date,
-            "suggestion": f"Please use {(amount // 100) * 100} or {((amount // 100) + 1) * 100} shares instead.",
-        }
+    # Validate amount and lot size, detect market type
+    market, error = _preflight("short", symbol, amount, today_date)
+    if error is not None:
+        return error
 
     # Step 2: Get current position
     with _position_lock(signature):
@@ -543,24 +542,14 @@ def short(symbol: str, amount: int) -> Dict[str, Any]:
         except Exception as e:
             print(e)
             print(today_date, signature)
-            return {"error": f"Failed to load latest position: {e}", "symbol": symbol, "date": today_date}
+            return _trade_error(f"Failed to load latest position: {e}", symbol, today_date)
 
     # Step 3: Get stock price
     try:
         if 'T' in today_date or (' ' in today_date and len(today_date) > 10):
             # Intraday 5-minute trading - use Alpaca API
-            import requests
-            alpaca_api_key = os.getenv("ALPACA_API_KEY")
-            alpaca_api_secret = os.getenv("ALPACA_API_SECRET")
-            
-            url = f"https://data.alpaca.markets/v2/stocks/{symbol}/bars/latest"
-            headers = {
-                "APCA-API-KEY-ID": alpaca_api_key,
-                "APCA-API-SECRET-KEY": alpaca_api_secret,
-            }
-            params = {"feed": "iex"}
-            
-            response = requests.get(url, headers=headers, params=params)
+            url = f"{_ALPACA_DATA_URL}/v2/stocks/{symbol}/bars/latest"
+            response = requests.get(url, headers=_ALPACA_HEADERS, params=_LATEST_BAR_PARAMS)
             if response.status_code == 200:
                 data = response.json()
                 bar = data.get("bar", {})
@@ -574,21 +563,21 @@ def short(symbol: str, amount: int) -> Dict[str, Any]:
             # Daily trading - use local price files
             this_symbol_price = get_open_prices(today_date, [symbol], market=market)[f"{symbol}_price"]
     except KeyError:
-        return {
-            "error": f"Symbol {symbol} not found! This action will not be allowed.",
-            "symbol": symbol,
-            "date": today_date,
-        }
+        return _trade_error(
+            f"Symbol {symbol} not found! This action will not be allowed.",
+            symbol,
+            today_date,
+        )
 
     # Step 4: Check if we already have a long position (can't short if you're long)
     current_shares = current_position.get(symbol, 0)
     if current_shares > 0:
-        return {
-            "error": f"Cannot short {symbol} while holding a long position ({current_shares} shares). Close your long position first.",
-            "symbol": symbol,
-            "current_position": current_shares,
-            "date": today_date,
-        }
+        return _trade_error(
+            f"Cannot short {symbol} while holding a long position ({current_shares} shares). Close your long position first.",
+            symbol,
+            today_date,
+            current_position=current_shares,
+        )
 
     # Step 5: Validate short position requirements
     # Short position limit should be the same as long position limit
@@ -602,16 +591,16 @@ def short(symbol: str, amount: int) -> Dict[str, Any]:
     
     # Check if short position would exceed the same limit as long positions
     if total_short_shares > max_long_shares:
-        return {
-            "error": f"Short position would exceed maximum allowed! With ${current_cash:.2f} cash and ${this_symbol_price:.2f} price, maximum is {max_long_shares} shares (same as long limit), but this trade would create {total_short_shares} shares short.",
-            "current_cash": current_cash,
-            "stock_price": this_symbol_price,
-            "max_allowed_shares": max_long_shares,
-            "current_short_shares": abs(current_shares) if current_shares < 0 else 0,
-            "new_short_shares": total_short_shares,
-            "symbol": symbol,
-            "date": today_date,
-        }
+        return _trade_error(
+            f"Short position would exceed maximum allowed! With ${current_cash:.2f} cash and ${this_symbol_price:.2f} price, maximum is {max_long_shares} shares (same as long limit), but this trade would create {total_short_shares} shares short.",
+            symbol,
+            today_date,
+            current_cash=current_cash,
+            stock_price=this_symbol_price,
+            max_allowed_shares=max_long_shares,
+            current_short_shares=abs(current_shares) if current_shares < 0 else 0,
+            new_short_shares=total_short_shares,
+        )
 
     # Step 6: Execute short operation
     new_position = current_position.copy()
@@ -630,20 +619,17 @@ def short(symbol: str, amount: int) -> Dict[str, Any]:
         log_path = log_path[7:]
     position_file_path = os.path.join(project_root, "data", log_path, signature, "position", "position.jsonl")
     with open(position_file_path, "a") as f:
-        print(
-            f"Writing to position.jsonl: {json.dumps({'date': today_date, 'id': current_action_id + 1, 'this_action':{'action':'short','symbol':symbol,'amount':amount},'positions': new_position})}"
-        )
-        f.write(
-            json.dumps(
-                {
-                    "date": today_date,
-                    "id": current_action_id + 1,
-                    "this_action": {"action": "short", "symbol": symbol, "amount": amount},
-                    "positions": new_position,
-                }
-            )
-            + "\n"
+        record = json.dumps(
+            {
+                "date": today_date,
+                "id": current_action_id + 1,
+                "this_action": {"action": "short", "symbol": symbol, "amount": amount},
+                "positions": new_position,
+            },
+            separators=_JSON_SEPARATORS,
         )
+        print(f"Writing to position.jsonl: {record}")
+        f.write(record + "\n")
 
     # Step 7: Return updated position
     write_config_value("IF_TRADE", True)
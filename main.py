@@ -2,18 +2,20 @@ import argparse
 import asyncio
 import json
 import os
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
-from pathlib import Path as _Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 from dotenv import load_dotenv
 import sys
 
 load_dotenv()
 
-from prompts.agent_prompt import all_nasdaq_100_symbols
+from prompts.symbols import all_nasdaq_100_symbols
 # Import tools and prompts
-from tools.general_tools import get_config_value, write_config_value
+from tools.general_tools import (RUNTIME_ENV_FILENAME, get_config_value, parse_datetime,
+                                 set_runtime_env_path, write_config_values)
 
 # Agent class mapping table - for dynamic import and instantiation
 AGENT_REGISTRY = {
@@ -35,7 +37,39 @@ AGENT_REGISTRY = {
     },
 }
 
+_SUPPORTED_AGENT_TYPES = ", ".join(AGENT_REGISTRY.keys())
 
+# Currency symbol per market, used in position summaries
+_CURRENCY = {"cn": "¥", "us": "$"}
+
+
+@dataclass(frozen=True, slots=True)
+class AgentInitParams:
+    """Constructor arguments for an agent instance (one per model)"""
+
+    signature: str
+    basemodel: str
+    stock_symbols: Optional[Sequence[str]]
+    log_path: str
+    max_steps: int
+    max_retries: int
+    base_delay: float
+    initial_cash: float
+    init_date: str
+    openai_base_url: Optional[str] = None
+    openai_api_key: Optional[str] = None
+    # Only accepted by BaseAgent_5Min; left out of the kwargs when None
+    live_mode: Optional[bool] = None
+
+    def as_kwargs(self) -> Dict[str, Any]:
+        """Shallow keyword-argument dict (unlike dataclasses.asdict, nothing is deep-copied)"""
+        kwargs = {name: getattr(self, name) for name in self.__slots__}
+        if self.live_mode is None:
+            del kwargs["live_mode"]
+        return kwargs
+
+
+@lru_cache(maxsize=None)
 def get_agent_class(agent_type):
     """
     Dynamically import and return the corresponding class based on agent type name
@@ -50,11 +84,10 @@ def get_agent_class(agent_type):
         ValueError: If agent type is not supported
         ImportError: If unable to import agent module
     """
-    if agent_type not in AGENT_REGISTRY:
-        supported_types = ", ".join(AGENT_REGISTRY.keys())
-        raise ValueError(f"❌ Unsupported agent type: {agent_type}\n" f"   Supported types: {supported_types}")
+    agent_info = AGENT_REGISTRY.get(agent_type)
+    if agent_info is None:
+        raise ValueError(f"❌ Unsupported agent type: {agent_type}\n" f"   Supported types: {_SUPPORTED_AGENT_TYPES}")
 
-    agent_info = AGENT_REGISTRY[agent_type]
     module_path = agent_info["module"]
     class_name = agent_info["class"]
 
@@ -72,6 +105,13 @@ def get_agent_class(agent_type):
         raise AttributeError(f"❌ Class {class_name} not found in module {module_path}: {e}")
 
 
+@lru_cache(maxsize=None)
+def _load_config_cached(path_str: str, mtime: float) -> Dict[str, Any]:
+    """Parse a JSON config file; cached per (path, mtime) so edits are picked up."""
+    with open(path_str, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
 def load_config(config_path=None):
     """
     Load configuration file from configs directory
@@ -93,8 +133,8 @@ def load_config(config_path=None):
         exit(1)
 
     try:
-        with open(config_path, "r", encoding="utf-8") as f:
-            config = json.load(f)
+        resolved = config_path.resolve()
+        config = _load_config_cached(str(resolved), resolved.stat().st_mtime)
         print(f"✅ Successfully loaded configuration file: {config_path}")
         return config
     except json.JSONDecodeError as e:
@@ -174,16 +214,9 @@ async def main(config_path=None, only_signature: str | None = None):
 
     # Validate date range
     # Support both YYYY-MM-DD and YYYY-MM-DD HH:MM:SS formats
-    if ' ' in INIT_DATE:
-        INIT_DATE_obj = datetime.strptime(INIT_DATE, "%Y-%m-%d %H:%M:%S")
-    else:
-        INIT_DATE_obj = datetime.strptime(INIT_DATE, "%Y-%m-%d")
-    
-    if ' ' in END_DATE:
-        END_DATE_obj = datetime.strptime(END_DATE, "%Y-%m-%d %H:%M:%S")
-    else:
-        END_DATE_obj = datetime.strptime(END_DATE, "%Y-%m-%d")
-    
+    INIT_DATE_obj = parse_datetime(INIT_DATE)
+    END_DATE_obj = parse_datetime(END_DATE)
+
     if INIT_DATE_obj > END_DATE_obj:
         print("❌ INIT_DATE is greater than END_DATE")
         exit(1)
@@ -198,6 +231,17 @@ async def main(config_path=None, only_signature: str | None = None):
             print(f"❌ No enabled model found with signature '{only_signature}'")
             return
 
+    # Validate every model up front so a bad entry is reported before any run starts
+    config_errors = [
+        f"❌ Model {model.get('name', 'unknown')} missing {field} field"
+        for model in enabled_models
+        for field in ("basemodel", "signature")
+        if not model.get(field)
+    ]
+    if config_errors:
+        print("\n".join(config_errors))
+        exit(1)
+
     # Get agent configuration
     agent_config = config.get("agent_config", {})
     log_config = config.get("log_config", {})
@@ -206,13 +250,11 @@ async def main(config_path=None, only_signature: str | None = None):
     base_delay = agent_config.get("base_delay", 0.5)
     initial_cash = agent_config.get("initial_cash", 10000.0)
 
-    # Display enabled model information
-    model_names = [m.get("name", m.get("signature")) for m in enabled_models]
-
     print("🚀 Starting trading experiment")
     print(f"🤖 Agent type: {agent_type}")
     print(f"📅 Date range: {INIT_DATE} to {END_DATE}")
-    print(f"🤖 Model list: {model_names}")
+    # Display enabled model information
+    print(f"🤖 Model list: {[m.get('name', m.get('signature')) for m in enabled_models]}")
     print(
         f"⚙️  Agent config: max_steps={max_steps}, max_retries={max_retries}, base_delay={base_delay}, initial_cash={initial_cash}"
     )
@@ -229,98 +271,94 @@ async def main(config_path=None, only_signature: str | None = None):
         print("🎉 All live agent subprocesses have exited")
         return
 
-    for model_config in enabled_models:
-        # Read basemodel and signature directly from configuration file
+    project_root = Path(__file__).resolve().parent
+    # Get log path configuration
+    log_path = log_config.get("log_path", "./data/agent_data")
+
+    # Select stock symbols based on agent type and market (the same for every model)
+    # BaseAgentAStock has its own default symbols, only set for BaseAgent
+    if agent_type == "BaseAgentAStock":
+        stock_symbols = None  # Let BaseAgentAStock use its default SSE 50
+    elif agent_type == "BaseAgent_5Min":
+        # For 5-min trading, use symbols from config (user-defined list)
+        stock_symbols = config.get("stock_symbols", ["AAPL", "MSFT", "GOOGL"])
+        print(f"📊 5-Min Trading Stocks: {', '.join(stock_symbols)}")
+    elif market == "cn":
+        from prompts.symbols import all_sse_50_symbols
+
+        stock_symbols = all_sse_50_symbols
+    else:
+        stock_symbols = all_nasdaq_100_symbols
+
+    # Agent initialization parameters shared by every model
+    base_init_params = {
+        "stock_symbols": stock_symbols,
+        "log_path": log_path,
+        "max_steps": max_steps,
+        "max_retries": max_retries,
+        "base_delay": base_delay,
+        "initial_cash": initial_cash,
+        "init_date": INIT_DATE,
+    }
+
+    # For BaseAgent_5Min, add live_mode parameter
+    if agent_type == "BaseAgent_5Min":
+        base_init_params["live_mode"] = is_live_mode
+        if is_live_mode:
+            print(f"🔴 LIVE MODE: Trading will start NOW and continue every 5 minutes")
+
+    async def _process_model(model_config: Dict[str, Any]) -> None:
+        # Read basemodel and signature directly from configuration file (validated above)
         model_name = model_config.get("name", "unknown")
         basemodel = model_config.get("basemodel")
         signature = model_config.get("signature")
         openai_base_url = model_config.get("openai_base_url",None)
         openai_api_key = model_config.get("openai_api_key",None)
-        
-        # Validate required fields
-        if not basemodel:
-            print(f"❌ Model {model_name} missing basemodel field")
-            continue
-        if not signature:
-            print(f"❌ Model {model_name} missing signature field")
-            continue
 
-        print("=" * 60)
-        print(f"🤖 Processing model: {model_name}")
-        print(f"📝 Signature: {signature}")
-        print(f"🔧 BaseModel: {basemodel}")
+        print(f"{'=' * 60}\n🤖 Processing model: {model_name}\n📝 Signature: {signature}\n🔧 BaseModel: {basemodel}")
             
         # Initialize runtime configuration
-        # Use the shared config file from RUNTIME_ENV_PATH in .env
-        
-        project_root = _Path(__file__).resolve().parent
-        
-        # Get log path configuration
-        log_path = log_config.get("log_path", "./data/agent_data")
-        
+        # Each model gets its own runtime env file next to its logs, bound to this task
+        # (and sent to the MCP tool services with every request), so models processed
+        # concurrently never see each other's SIGNATURE/TODAY_DATE/IF_TRADE
+        model_dir = project_root / log_path / signature
+        runtime_env_path = model_dir / RUNTIME_ENV_FILENAME
+        set_runtime_env_path(runtime_env_path)
+
         # Check position file to determine if this is a fresh start
-        position_file = project_root / log_path / signature / "position" / "position.jsonl"
+        position_file = model_dir / "position" / "position.jsonl"
         
         # If position file doesn't exist, reset config to start from INIT_DATE
         if not position_file.exists():
-            # Clear the shared config file for fresh start
-            from tools.general_tools import _resolve_runtime_env_path
-            runtime_env_path = _resolve_runtime_env_path()
-            if os.path.exists(runtime_env_path):
-                os.remove(runtime_env_path)
-                if agent_type == "BaseAgent_5Min" and config.get("live_mode", False):
+            # Clear this model's config file for fresh start
+            if runtime_env_path.exists():
+                runtime_env_path.unlink()
+                if is_live_mode:
                     print(f"🔄 Position file not found, cleared config for fresh start (LIVE MODE)")
                 else:
                     print(f"🔄 Position file not found, cleared config for fresh start from {INIT_DATE}")
         
-        # Write config values to shared config file (from .env RUNTIME_ENV_PATH)
-        write_config_value("SIGNATURE", signature)
-        write_config_value("IF_TRADE", False)
-        write_config_value("MARKET", market)
-        write_config_value("LOG_PATH", log_path)
+        write_config_values({
+            "SIGNATURE": signature,
+            "IF_TRADE": False,
+            "MARKET": market,
+            "LOG_PATH": log_path,
+        })
         
-        print(f"✅ Runtime config initialized: SIGNATURE={signature}, MARKET={market}")
-
-        # Select stock symbols based on agent type and market
-        # BaseAgentAStock has its own default symbols, only set for BaseAgent
-        if agent_type == "BaseAgentAStock":
-            stock_symbols = None  # Let BaseAgentAStock use its default SSE 50
-        elif agent_type == "BaseAgent_5Min":
-            # For 5-min trading, use symbols from config (user-defined list)
-            stock_symbols = config.get("stock_symbols", ["AAPL", "MSFT", "GOOGL"])
-            print(f"📊 5-Min Trading Stocks: {', '.join(stock_symbols)}")
-        elif market == "cn":
-            from prompts.agent_prompt import all_sse_50_symbols
-
-            stock_symbols = all_sse_50_symbols
-        else:
-            stock_symbols = all_nasdaq_100_symbols
+        print(f"✅ Runtime config initialized: SIGNATURE={signature}, MARKET={market} ({runtime_env_path})")
 
         try:
             # Prepare agent initialization parameters
-            agent_init_params = {
-                "signature": signature,
-                "basemodel": basemodel,
-                "stock_symbols": stock_symbols,
-                "log_path": log_path,
-                "max_steps": max_steps,
-                "max_retries": max_retries,
-                "base_delay": base_delay,
-                "initial_cash": initial_cash,
-                "init_date": INIT_DATE,
-                "openai_base_url": openai_base_url,
-                "openai_api_key": openai_api_key
-            }
-            
-            # For BaseAgent_5Min, add live_mode parameter
-            if agent_type == "BaseAgent_5Min":
-                live_mode = config.get("live_mode", False)
-                agent_init_params["live_mode"] = live_mode
-                if live_mode:
-                    print(f"🔴 LIVE MODE: Trading will start NOW and continue every 5 minutes")
-            
+            agent_init_params = AgentInitParams(
+                **base_init_params,
+                signature=signature,
+                basemodel=basemodel,
+                openai_base_url=openai_base_url,
+                openai_api_key=openai_api_key,
+            )
+
             # Dynamically create Agent instance
-            agent = AgentClass(**agent_init_params)
+            agent = AgentClass(**agent_init_params.as_kwargs())
 
             print(f"✅ {agent_type} instance created successfully: {agent}")
 
@@ -329,7 +367,7 @@ async def main(config_path=None, only_signature: str | None = None):
             print("✅ Initialization successful")
             
             # Run based on agent mode
-            if agent_type == "BaseAgent_5Min" and config.get("live_mode", False):
+            if is_live_mode:
                 # Live mode: run continuously from now
                 await agent.run_live()
             else:
@@ -339,7 +377,7 @@ async def main(config_path=None, only_signature: str | None = None):
             # Display final position summary
             summary = agent.get_position_summary()
             # Get currency symbol from agent's actual market (more accurate)
-            currency_symbol = "¥" if agent.market == "cn" else "$"
+            currency_symbol = _CURRENCY.get(agent.market, "$")
             print(f"📊 Final position summary:")
             print(f"   - Latest date: {summary.get('latest_date')}")
             print(f"   - Total records: {summary.get('total_records')}")
@@ -352,9 +390,18 @@ async def main(config_path=None, only_signature: str | None = None):
             # continue  # Continue processing next model
             exit()  # Or exit program
 
-        print("=" * 60)
-        print(f"✅ Model {model_name} ({signature}) processing completed")
-        print("=" * 60)
+        print(f"{'=' * 60}\n✅ Model {model_name} ({signature}) processing completed\n{'=' * 60}")
+
+    # Each model is an independent run with its own runtime env file, so models are
+    # processed concurrently, bounded to stay within provider rate limits
+    max_concurrent_models = max(1, int(config.get("max_concurrent_models", 4)))
+    semaphore = asyncio.Semaphore(max_concurrent_models)
+
+    async def _process_model_bounded(model_config: Dict[str, Any]) -> None:
+        async with semaphore:
+            await _process_model(model_config)
+
+    await asyncio.gather(*(_process_model_bounded(model_config) for model_config in enabled_models))
 
     print("🎉 All models processing completed!")
 
@@ -0,0 +1,3 @@
+"""
+System prompt templates for the trading agents
+"""
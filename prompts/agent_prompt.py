@@ -1,24 +1,19 @@
-import os
-
 from dotenv import load_dotenv
 
 load_dotenv()
+import asyncio
 import json
-import os
-import sys
+import logging
+import re
 from datetime import datetime, timedelta
 from pathlib import Path
+from string import Template
 from typing import Dict, List, Optional
 
-# Add project root directory to Python path
-project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.insert(0, project_root)
+from prompts.symbols import all_nasdaq_100_symbols, all_sse_50_symbols
 from tools.general_tools import get_config_value
-from tools.price_tools import (all_nasdaq_100_symbols, all_sse_50_symbols,
-                               format_price_dict_with_names, get_open_prices,
-                               get_today_init_position, get_yesterday_date,
-                               get_yesterday_open_and_close_price,
-                               get_yesterday_profit)
+
+logger = logging.getLogger(__name__)
 
 STOP_SIGNAL = "<FINISH_SIGNAL>"
 
@@ -58,30 +53,39 @@ When you think your task is complete, output
 {STOP_SIGNAL}
 """
 
+# Compiled once at import: placeholders become $-style and the static STOP_SIGNAL is
+# bound up front, so each call only substitutes the per-day fields
+_AGENT_PROMPT_TEMPLATE = Template(
+    re.sub(r"\{(\w+)\}", r"${\1}", agent_system_prompt.replace("{STOP_SIGNAL}", STOP_SIGNAL))
+)
 
-def get_agent_system_prompt(
+
+async def get_agent_system_prompt(
     today_date: str, signature: str, market: str = "us", stock_symbols: Optional[List[str]] = None
 ) -> str:
-    print(f"signature: {signature}")
-    print(f"today_date: {today_date}")
-    print(f"market: {market}")
+    # Price tools are imported lazily so importing this module (for STOP_SIGNAL or
+    # the symbol lists) stays cheap
+    from tools.price_tools import (aget_open_prices, aget_today_init_position,
+                                   aget_yesterday_open_and_close_price)
+
+    logger.debug("signature: %s, today_date: %s, market: %s", signature, today_date, market)
 
     # Auto-select stock symbols based on market if not provided
     if stock_symbols is None:
         stock_symbols = all_sse_50_symbols if market == "cn" else all_nasdaq_100_symbols
 
-    # Get yesterday's buy and sell prices
-    yesterday_buy_prices, yesterday_sell_prices = get_yesterday_open_and_close_price(
-        today_date, stock_symbols, market=market
+    # Yesterday's buy/sell prices, today's buy prices and the initial position are
+    # independent lookups, so fetch them concurrently
+    (yesterday_buy_prices, yesterday_sell_prices), today_buy_price, today_init_position = await asyncio.gather(
+        aget_yesterday_open_and_close_price(today_date, stock_symbols, market=market),
+        aget_open_prices(today_date, stock_symbols, market=market),
+        aget_today_init_position(today_date, signature),
     )
-    today_buy_price = get_open_prices(today_date, stock_symbols, market=market)
-    today_init_position = get_today_init_position(today_date, signature)
     # yesterday_profit = get_yesterday_profit(today_date, yesterday_buy_prices, yesterday_sell_prices, today_init_position)
     
-    return agent_system_prompt.format(
+    return _AGENT_PROMPT_TEMPLATE.substitute(
         date=today_date,
         positions=today_init_position,
-        STOP_SIGNAL=STOP_SIGNAL,
         yesterday_close_price=yesterday_sell_prices,
         today_buy_price=today_buy_price,
         # yesterday_profit=yesterday_profit
@@ -89,8 +93,9 @@ def get_agent_system_prompt(
 
 
 if __name__ == "__main__":
+    # Run from the project root: python -m prompts.agent_prompt
     today_date = get_config_value("TODAY_DATE")
     signature = get_config_value("SIGNATURE")
     if signature is None:
         raise ValueError("SIGNATURE environment variable is not set")
-    print(get_agent_system_prompt(today_date, signature))
+    print(asyncio.run(get_agent_system_prompt(today_date, signature)))
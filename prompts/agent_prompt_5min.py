@@ -3,22 +3,20 @@ Intraday 5-minute trading agent prompt
 Handles real-time intraday trading decisions based on 5-minute price bars
 """
 
-import os
+import re
 import sys
 from datetime import datetime, timedelta
 from pathlib import Path
+from string import Template
 from typing import Dict, List, Optional
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Add project root directory to Python path
-project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.insert(0, project_root)
-
-from tools.general_tools import get_config_value
+from tools.general_tools import get_config_value, parse_datetime
 from tools.price_tools import (
+    FormattedBarRing,
     all_nasdaq_100_symbols,
     get_today_init_position,
     format_5min_bars
@@ -26,6 +24,12 @@ from tools.price_tools import (
 
 STOP_SIGNAL = "<FINISH_SIGNAL>"
 
+# Days back to the previous weekday, indexed by weekday() (Mon -> Fri is 3, Sun -> Fri is 2)
+_PREV_WEEKDAY_OFFSET = (3, 1, 1, 1, 1, 1, 2)
+
+# Number of 5-minute bars per day included in the prompt
+MAX_PROMPT_BARS = 50
+
 intraday_agent_system_prompt = """
 You are analyzing 5-minute stock price data for a simulated trading exercise.
 
@@ -81,6 +85,52 @@ When you think your task is complete, output
 {STOP_SIGNAL}
 """
 
+# Compiled once at import: literal "$" signs are escaped, placeholders become $-style
+# and the static STOP_SIGNAL is bound up front, so each call only substitutes fields
+_INTRADAY_PROMPT_TEMPLATE = Template(
+    re.sub(
+        r"\{(\w+)\}",
+        r"${\1}",
+        intraday_agent_system_prompt.replace("$", "$$").replace("{STOP_SIGNAL}", STOP_SIGNAL),
+    )
+)
+
+
+# Raw/legacy bar keys -> display names used in the prompt
+_BAR_KEY_MAP = {
+    "c": "Close Price",
+    "close": "Close Price",
+    "close_price": "Close Price",
+    "h": "High Price",
+    "high": "High Price",
+    "high_price": "High Price",
+    "l": "Low Price",
+    "low": "Low Price",
+    "low_price": "Low Price",
+    "n": "Number of Trades",
+    "trade_count": "Number of Trades",
+    "number_of_trades": "Number of Trades",
+    "o": "Open Price",
+    "open": "Open Price",
+    "open_price": "Open Price",
+    "t": "Timestamp",
+    "timestamp": "Timestamp",
+    "v": "Volume",
+    "volume": "Volume",
+    "vw": "Volume-Weighted Average Price",
+    "vwap": "Volume-Weighted Average Price",
+    "volume_weighted_average_price": "Volume-Weighted Average Price",
+}
+# Interned display names become the keys of every translated bar, so the lookups
+# in tools.price_tools (which interns the same names) hit on identity
+_BAR_KEY_MAP = {key: sys.intern(name) for key, name in _BAR_KEY_MAP.items()}
+
+
+def translate_bar_keys(bars: List[Dict]) -> List[Dict]:
+    """Rename bar keys to their display names (unknown keys are kept as-is)"""
+    key_map = _BAR_KEY_MAP
+    return [{key_map.get(key, key): value for key, value in bar.items()} for bar in bars]
+
 
 def get_intraday_agent_system_prompt(
     today_datetime: str,
@@ -100,17 +150,13 @@ def get_intraday_agent_system_prompt(
     Returns:
         Formatted system prompt string
     """
-    # Parse datetime - handle both old format and ISO 8601 with timezone
+    # Parse datetime - handles ISO 8601 with timezone (e.g., "2025-11-07T12:37:13-05:00")
+    # and the old format (e.g., "2025-11-07 12:37:13")
     try:
-        # Try ISO 8601 format first (e.g., "2025-11-07T12:37:13-05:00")
-        current_dt = datetime.fromisoformat(today_datetime)
-    except:
-        try:
-            # Fallback to old format (e.g., "2025-11-07 12:37:13")
-            current_dt = datetime.strptime(today_datetime, "%Y-%m-%d %H:%M:%S")
-        except:
-            # Last resort: assume now
-            current_dt = datetime.now()
+        current_dt = parse_datetime(today_datetime)
+    except ValueError:
+        # Last resort: assume now
+        current_dt = datetime.now()
     
     today_date = current_dt.strftime("%Y-%m-%d")
     current_time = current_dt.strftime("%H:%M:%S")
@@ -120,15 +166,14 @@ def get_intraday_agent_system_prompt(
     
     # Get yesterday's closing positions (from previous trading day end)
     try:
-        yesterday_dt = current_dt - timedelta(days=1)
-        # Skip weekends
-        while yesterday_dt.weekday() >= 5:
-            yesterday_dt -= timedelta(days=1)
+        # Previous weekday, skipping weekends (Saturday -> Friday, Sunday -> Friday)
+        yesterday_dt = current_dt - timedelta(days=_PREV_WEEKDAY_OFFSET[current_dt.weekday()])
         # Get end of previous trading day (4:00 PM = 16:00:00)
         yesterday_close_dt = yesterday_dt.replace(hour=16, minute=0, second=0)
         yesterday_close_str = yesterday_close_dt.strftime("%Y-%m-%d %H:%M:%S")
         yesterday_positions = get_today_init_position(yesterday_close_str, signature)
-    except:
+    except (OSError, KeyError, ValueError):
+        # Unreadable position file or unparsable dates (includes json.JSONDecodeError)
         yesterday_positions = {"CASH": 10000.0}  # Default initial cash
     
     # Note: The actual bar data will be fetched by the agent using MCP tools
@@ -140,7 +185,7 @@ def get_intraday_agent_system_prompt(
     yesterday_close_price = "Unknown (fetch using get_5min_bars tool)"
     current_price = "Unknown (fetch using get_latest_bar tool)"
     
-    return intraday_agent_system_prompt.format(
+    return _INTRADAY_PROMPT_TEMPLATE.substitute(
         symbol=symbol,
         date=today_date,
         current_time=current_time,
@@ -149,8 +194,7 @@ def get_intraday_agent_system_prompt(
         positions=current_positions,
         current_price=current_price,
         today_bars=today_bars_text,
-        yesterday_bars=yesterday_bars_text,
-        STOP_SIGNAL=STOP_SIGNAL
+        yesterday_bars=yesterday_bars_text
     )
 
 
@@ -160,7 +204,9 @@ def get_intraday_agent_system_prompt_with_bars(
     symbol: str,
     today_bars: List[Dict],
     yesterday_bars: List[Dict],
-    market: str = "us"
+    market: str = "us",
+    today_ring: Optional[FormattedBarRing] = None,
+    yesterday_ring: Optional[FormattedBarRing] = None
 ) -> str:
     """
     Generate system prompt for intraday agent with pre-fetched bar data.
@@ -173,21 +219,20 @@ def get_intraday_agent_system_prompt_with_bars(
         today_bars: List of today's 5-minute bars
         yesterday_bars: List of yesterday's 5-minute bars
         market: Market type
+        today_ring: Optional per-symbol ring kept across ticks, so only newly
+            arrived bars are formatted
+        yesterday_ring: Optional ring for yesterday's bars (formatted once, reused all day)
     
     Returns:
         Formatted system prompt with bar data
     """
-    # Parse datetime - handle both old format and ISO 8601 with timezone
+    # Parse datetime - handles ISO 8601 with timezone (e.g., "2025-11-07T12:37:13-05:00")
+    # and the old format (e.g., "2025-11-07 12:37:13")
     try:
-        # Try ISO 8601 format first (e.g., "2025-11-07T12:37:13-05:00")
-        current_dt = datetime.fromisoformat(today_datetime)
-    except:
-        try:
-            # Fallback to old format (e.g., "2025-11-07 12:37:13")
-            current_dt = datetime.strptime(today_datetime, "%Y-%m-%d %H:%M:%S")
-        except:
-            # Last resort: assume now
-            current_dt = datetime.now()
+        current_dt = parse_datetime(today_datetime)
+    except ValueError:
+        # Last resort: assume now
+        current_dt = datetime.now()
     
     today_date = current_dt.strftime("%Y-%m-%d")
     current_time = current_dt.strftime("%H:%M:%S")
@@ -196,73 +241,47 @@ def get_intraday_agent_system_prompt_with_bars(
     current_positions = get_today_init_position(today_datetime, signature)
     
     try:
-        yesterday_dt = current_dt - timedelta(days=1)
-        while yesterday_dt.weekday() >= 5:
-            yesterday_dt -= timedelta(days=1)
+        yesterday_dt = current_dt - timedelta(days=_PREV_WEEKDAY_OFFSET[current_dt.weekday()])
         yesterday_close_dt = yesterday_dt.replace(hour=16, minute=0, second=0)
         yesterday_close_str = yesterday_close_dt.strftime("%Y-%m-%d %H:%M:%S")
         yesterday_positions = get_today_init_position(yesterday_close_str, signature)
-    except:
+    except (OSError, KeyError, ValueError):
         yesterday_positions = {"CASH": 10000.0}
     
     # Format bar data
-    def translate_bar_keys(bars: List[Dict]) -> List[Dict]:
-        key_map = {
-            "c": "Close Price",
-            "close": "Close Price",
-            "close_price": "Close Price",
-            "h": "High Price",
-            "high": "High Price",
-            "high_price": "High Price",
-            "l": "Low Price",
-            "low": "Low Price",
-            "low_price": "Low Price",
-            "n": "Number of Trades",
-            "trade_count": "Number of Trades",
-            "number_of_trades": "Number of Trades",
-            "o": "Open Price",
-            "open": "Open Price",
-            "open_price": "Open Price",
-            "t": "Timestamp",
-            "timestamp": "Timestamp",
-            "v": "Volume",
-            "volume": "Volume",
-            "vw": "Volume-Weighted Average Price",
-            "vwap": "Volume-Weighted Average Price",
-            "volume_weighted_average_price": "Volume-Weighted Average Price",
-        }
-        translated = []
-        for bar in bars:
-            translated_bar = {}
-            for key, value in bar.items():
-                new_key = key_map.get(key, key)
-                translated_bar[new_key] = value
-            translated.append(translated_bar)
-        return translated
-
-    today_bars_translated = translate_bar_keys(today_bars) if today_bars else None
-    yesterday_bars_translated = translate_bar_keys(yesterday_bars) if yesterday_bars else None
-
-    today_bars_text = format_5min_bars(today_bars_translated, max_bars=50) if today_bars_translated else "No bars available yet (market just opened or data pending)"
-    yesterday_bars_text = format_5min_bars(yesterday_bars_translated, max_bars=50) if yesterday_bars_translated else "No historical bars available"
+    # Only the last MAX_PROMPT_BARS bars are shown (and the last one priced), so
+    # translate just that window instead of the whole day
+    today_bars_translated = translate_bar_keys(today_bars[-MAX_PROMPT_BARS:]) if today_bars else None
+    yesterday_bars_translated = translate_bar_keys(yesterday_bars[-MAX_PROMPT_BARS:]) if yesterday_bars else None
+
+    def render_bars(bars_translated: Optional[List[Dict]], ring: Optional[FormattedBarRing]) -> str:
+        if ring is None:
+            return format_5min_bars(bars_translated, max_bars=MAX_PROMPT_BARS)
+        ring.extend(bars_translated)
+        return ring.render()
+
+    today_bars_text = render_bars(today_bars_translated, today_ring) if today_bars_translated else "No bars available yet (market just opened or data pending)"
+    yesterday_bars_text = render_bars(yesterday_bars_translated, yesterday_ring) if yesterday_bars_translated else "No historical bars available"
     
     # Extract prices from bars with fallbacks
     def extract_close(bar_list_translated: Optional[List[Dict]], bar_list_raw: Optional[List[Dict]]) -> str:
         if bar_list_translated:
             close_val = bar_list_translated[-1].get("Close Price")
-            if close_val not in (None, "Unknown"):
+            if close_val is not None and close_val != "Unknown":
                 return close_val
         if bar_list_raw:
             last_bar = bar_list_raw[-1]
             for key in ("close", "c", "close_price", "Close Price"):
-                if key in last_bar and last_bar[key] not in (None, "Unknown"):
-                    return last_bar[key]
+                # One get per alias; a missing key reads as None and is skipped
+                close_val = last_bar.get(key)
+                if close_val is not None and close_val != "Unknown":
+                    return close_val
         return "Data not available"
 
     yesterday_close_price = extract_close(yesterday_bars_translated, yesterday_bars)
     current_price = extract_close(today_bars_translated, today_bars)
     
-    return intraday_agent_system_prompt.format(
+    return _INTRADAY_PROMPT_TEMPLATE.substitute(
         symbol=symbol,
         date=today_date,
         current_time=current_time,
@@ -271,12 +290,12 @@ def get_intraday_agent_system_prompt_with_bars(
         positions=current_positions,
         current_price=current_price,
         today_bars=today_bars_text,
-        yesterday_bars=yesterday_bars_text,
-        STOP_SIGNAL=STOP_SIGNAL
+        yesterday_bars=yesterday_bars_text
     )
 
 
 if __name__ == "__main__":
+    # Run from the project root: python -m prompts.agent_prompt_5min
     # Test prompt generation
     test_datetime = "2025-11-06 14:30:00"
     test_signature = "test-agent"
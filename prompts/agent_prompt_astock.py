@@ -3,21 +3,16 @@ A股专用Agent提示词模块
 Chinese A-shares specific agent prompt module
 """
 
-import os
 
 from dotenv import load_dotenv
 
 load_dotenv()
 import json
-import os
-import sys
+import logging
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional
 
-# Add project root directory to Python path
-project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.insert(0, project_root)
 from tools.general_tools import get_config_value
 from tools.price_tools import (all_sse_50_symbols,
                                format_price_dict_with_names, get_open_prices,
@@ -25,6 +20,8 @@ from tools.price_tools import (all_sse_50_symbols,
                                get_yesterday_open_and_close_price,
                                get_yesterday_profit)
 
+logger = logging.getLogger(__name__)
+
 STOP_SIGNAL = "<FINISH_SIGNAL>"
 
 agent_system_prompt_astock = """
@@ -94,9 +91,7 @@ def get_agent_system_prompt_astock(today_date: str, signature: str, stock_symbol
     Returns:
         格式化的系统提示词字符串
     """
-    print(f"signature: {signature}")
-    print(f"today_date: {today_date}")
-    print(f"market: cn (A-shares)")
+    logger.debug("signature: %s, today_date: %s, market: cn (A-shares)", signature, today_date)
 
     # 默认使用上证50成分股
     if stock_symbols is None:
@@ -127,6 +122,7 @@ def get_agent_system_prompt_astock(today_date: str, signature: str, stock_symbol
 
 
 if __name__ == "__main__":
+    # Run from the project root: python -m prompts.agent_prompt_astock
     today_date = get_config_value("TODAY_DATE")
     signature = get_config_value("SIGNATURE")
     if signature is None:
@@ -6,14 +6,51 @@ Accumulates today's data throughout the trading day
 
 import json
 import os
+import threading
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+import pytz
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+try:
+    import orjson  # type: ignore[import-not-found]
+
+    HAVE_ORJSON = True
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+    HAVE_ORJSON = False
 
 load_dotenv()
 
+# Market (ET) and API (UTC) timezones, resolved once instead of on every fetch
+_ET = pytz.timezone('US/Eastern')
+_UTC = pytz.UTC
+
+# Days back to the previous weekday, indexed by weekday() (Mon -> Fri is 3, Sun -> Fri is 2)
+_PREV_WEEKDAY_OFFSET = (3, 1, 1, 1, 1, 1, 2)
+
+# Symbols per multi-symbol bars request (keeps the query string URL-length safe)
+_MULTI_FETCH_CHUNK = 50
+
+# Worker threads for preload and the cap on concurrent Alpaca requests
+# (keeps bursts well under the 200 requests/minute rate limit)
+_PRELOAD_WORKERS = 16
+_MAX_CONCURRENT_REQUESTS = 8
+
+
+@lru_cache(maxsize=512)
+def _read_day_cache_file(path_str: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+    """Parse a day cache file; cached per (path, mtime, size) so rewrites are picked up"""
+    with open(path_str, 'rb') as f:
+        raw = f.read()
+    return orjson.loads(raw) if HAVE_ORJSON else json.loads(raw)
+
+
 class BarCacheManager:
     """Manages caching of 5-minute bar data to minimize API calls"""
     
@@ -26,21 +63,48 @@ class BarCacheManager:
         """
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._created_symbol_dirs = set()
         
         # Alpaca API configuration
         self.api_key = os.getenv("ALPACA_API_KEY")
         self.api_secret = os.getenv("ALPACA_API_SECRET")
         self.base_url = "https://data.alpaca.markets/v2"
+        
+        # Shared session so TCP/TLS connections are reused across requests and threads
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32))
+        # Auth headers are set once on the session rather than built per request
+        if self.api_key and self.api_secret:
+            self._session.headers.update({
+                "APCA-API-KEY-ID": self.api_key,
+                "APCA-API-SECRET-KEY": self.api_secret,
+            })
+        self._request_slots = threading.Semaphore(_MAX_CONCURRENT_REQUESTS)
+        # symbol -> (next expected bar time in ET, today's bars so far)
+        self._today_tip: Dict[str, Tuple[datetime, List[Dict[str, Any]]]] = {}
         self._alpaca_calendar = self._load_alpaca_calendar()
+        # Sorted open trading days from the calendar, for bisect lookups
+        self._trading_days = sorted(
+            entry["date"]
+            for entry in self._alpaca_calendar or ()
+            if entry.get("date") and entry.get("open") and entry.get("close")
+        )
     
     def _get_symbol_dir(self, symbol: str) -> Path:
         """Get the directory for a symbol"""
         return self.cache_dir / symbol
     
-    def _get_day_cache_file(self, symbol: str, date: str) -> Path:
-        """Get the cache file path for a specific symbol and date"""
+    def _get_day_cache_file(self, symbol: str, date: str, create_dir: bool = False) -> Path:
+        """
+        Get the cache file path for a specific symbol and date
+        
+        The symbol directory is only created when writing (create_dir=True), and only
+        once per symbol, so cache lookups do not cost an extra mkdir syscall.
+        """
         symbol_dir = self._get_symbol_dir(symbol)
-        symbol_dir.mkdir(parents=True, exist_ok=True)
+        if create_dir and symbol not in self._created_symbol_dirs:
+            symbol_dir.mkdir(parents=True, exist_ok=True)
+            self._created_symbol_dirs.add(symbol)
         return symbol_dir / f"{date}.json"
     
     def _load_alpaca_calendar(self) -> Optional[List[Dict[str, Any]]]:
@@ -53,15 +117,7 @@ class BarCacheManager:
                 "start": (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d"),
                 "end": (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d"),
             }
-            response = requests.get(
-                url,
-                headers={
-                    "APCA-API-KEY-ID": self.api_key,
-                    "APCA-API-SECRET-KEY": self.api_secret,
-                },
-                params=params,
-                timeout=10,
-            )
+            response = self._get(url, params=params, timeout=10)
             if response.status_code != 200:
                 return None
             data = response.json()
@@ -78,37 +134,33 @@ class BarCacheManager:
         if reference is None:
             reference = datetime.now()
         
-        if self._alpaca_calendar:
-            # calendar entries are ordered by date ascending
-            ref_date_str = reference.strftime("%Y-%m-%d")
-            prev_date = None
-            for entry in self._alpaca_calendar:
-                if entry.get("date") and entry["date"] < ref_date_str and entry.get("open") and entry.get("close"):
-                    prev_date = entry["date"]
-            if prev_date:
-                return datetime.strptime(prev_date, "%Y-%m-%d")
-        
-        prev_day = reference - timedelta(days=1)
-        while prev_day.weekday() >= 5:  # 5=Saturday, 6=Sunday
-            prev_day -= timedelta(days=1)
-        return prev_day
+        if self._trading_days:
+            # Last trading day strictly before the reference date
+            idx = bisect_left(self._trading_days, reference.strftime("%Y-%m-%d"))
+            if idx:
+                return datetime.fromisoformat(self._trading_days[idx - 1])
+        
+        # Previous weekday in one step (Monday -> Friday, weekends -> Friday)
+        return reference - timedelta(days=_PREV_WEEKDAY_OFFSET[reference.weekday()])
     
     def _load_day_cache(self, symbol: str, date: str) -> Optional[List[Dict[str, Any]]]:
         """Load cached data for a specific symbol and date"""
         cache_file = self._get_day_cache_file(symbol, date)
-        if cache_file.exists():
-            try:
-                with open(cache_file, 'r') as f:
-                    data = json.load(f)
-                    return data.get("bars", [])
-            except Exception as e:
-                print(f"Error loading cache for {symbol} on {date}: {e}")
-                return None
-        return None
+        # stat() directly instead of exists() + open(): a miss costs a single syscall,
+        # and a hit on an unchanged file is served from the parsed-file cache
+        try:
+            st = cache_file.stat()
+            data = _read_day_cache_file(str(cache_file), st.st_mtime_ns, st.st_size)
+            return list(data.get("bars", []))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error loading cache for {symbol} on {date}: {e}")
+            return None
     
     def _save_day_cache(self, symbol: str, date: str, bars: List[Dict[str, Any]]) -> None:
         """Save cached data for a specific symbol and date"""
-        cache_file = self._get_day_cache_file(symbol, date)
+        cache_file = self._get_day_cache_file(symbol, date, create_dir=True)
         try:
             cache_data = {
                 "symbol": symbol,
@@ -117,11 +169,88 @@ class BarCacheManager:
                 "bar_count": len(bars),
                 "last_updated": datetime.now().isoformat()
             }
-            with open(cache_file, 'w') as f:
-                json.dump(cache_data, f, indent=2)
+            # Compact separators: the bar list is machine-read only, and pretty-printing
+            # roughly doubles both file size and serialization time
+            # orjson (optional) serializes the numeric bar payload several times faster
+            if HAVE_ORJSON:
+                with open(cache_file, 'wb') as f:
+                    f.write(orjson.dumps(cache_data))
+            else:
+                with open(cache_file, 'w') as f:
+                    json.dump(cache_data, f, separators=(",", ":"))
         except Exception as e:
             print(f"Error saving cache for {symbol} on {date}: {e}")
     
+    def _to_utc_range(self, start_date: str, end_date: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Convert an ET date range into the UTC ISO strings expected by Alpaca
+        
+        Args:
+            start_date: Start date in 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS' format
+            end_date: End date in 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS' format (optional)
+        
+        Returns:
+            (start, end) formatted as ISO 8601 with 'Z' suffix
+        """
+        # Parse dates - handle both "YYYY-MM-DD" and "YYYY-MM-DD HH:MM:SS" formats
+        # (fromisoformat is the C fast path for both; strptime is much slower)
+        # ASSUME input times are already in ET (market time)
+        start_dt = datetime.fromisoformat(start_date)
+        if len(start_date) > 10:  # Has time component
+            # Localize to ET
+            start_dt = _ET.localize(start_dt)
+        else:
+            start_dt = _ET.localize(start_dt.replace(hour=9, minute=30))  # Default to market open
+        
+        if end_date:
+            end_dt = datetime.fromisoformat(end_date)
+            if len(end_date) > 10:
+                end_dt = _ET.localize(end_dt)
+            else:
+                end_dt = _ET.localize(end_dt.replace(hour=16, minute=0))  # Default to market close
+        else:
+            # Convert current time to ET
+            end_dt = datetime.now(_ET)
+        
+        # Convert ET to UTC for Alpaca API (requires UTC with 'Z' suffix)
+        start_dt_utc = start_dt.astimezone(_UTC)
+        end_dt_utc = end_dt.astimezone(_UTC)
+        
+        # Format as ISO 8601 with 'Z' suffix (e.g., "2024-01-03T00:00:00Z")
+        return start_dt_utc.strftime("%Y-%m-%dT%H:%M:%SZ"), end_dt_utc.strftime("%Y-%m-%dT%H:%M:%SZ")
+    
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """GET through the shared session, bounded by the concurrent request cap"""
+        with self._request_slots:
+            return self._session.get(url, **kwargs)
+    
+    @staticmethod
+    def _format_bar(bar: Dict[str, Any]) -> Dict[str, Any]:
+        """Expand a raw Alpaca bar into the cached bar layout (short and long keys)"""
+        formatted = {
+            "timestamp": bar["t"],
+            "t": bar["t"],
+            "open": bar["o"],
+            "o": bar["o"],
+            "high": bar["h"],
+            "h": bar["h"],
+            "low": bar["l"],
+            "l": bar["l"],
+            "close": bar["c"],
+            "c": bar["c"],
+            "volume": bar["v"],
+            "v": bar["v"],
+        }
+        trade_count = bar.get("n")
+        if trade_count is not None:
+            formatted["trade_count"] = trade_count
+            formatted["n"] = trade_count
+        vwap_val = bar.get("vw")
+        if vwap_val is not None:
+            formatted["vwap"] = vwap_val
+            formatted["vw"] = vwap_val
+        return formatted
+    
     def _fetch_from_alpaca(
         self, 
         symbol: str, 
@@ -144,45 +273,94 @@ class BarCacheManager:
             return []
         
         try:
-            import pytz
+            start_str, end_str = self._to_utc_range(start_date, end_date)
             
-            # ET timezone for market hours
-            et_tz = pytz.timezone('US/Eastern')
+            # Bars are formatted as each page streams in; raw pages are not kept
+            formatted_bars = list(self._iter_alpaca_bars(symbol, start_str, end_str))
             
-            # Parse dates - handle both "YYYY-MM-DD" and "YYYY-MM-DD HH:MM:SS" formats
-            # ASSUME input times are already in ET (market time)
-            if len(start_date) > 10:  # Has time component
-                start_dt = datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S")
-                # Localize to ET
-                start_dt = et_tz.localize(start_dt)
-            else:
-                start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-                start_dt = et_tz.localize(start_dt.replace(hour=9, minute=30))  # Default to market open
+            # Debug: Check if bars is empty
+            if not formatted_bars:
+                print(f"⚠️  No bars returned for {symbol}")
+                print(f"   Request: {start_str} to {end_str}")
+                return []
             
-            if end_date:
-                if len(end_date) > 10:
-                    end_dt = datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S")
-                    end_dt = et_tz.localize(end_dt)
-                else:
-                    end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-                    end_dt = et_tz.localize(end_dt.replace(hour=16, minute=0))  # Default to market close
-            else:
-                # Convert current time to ET
-                end_dt = datetime.now(et_tz)
+            print(f"✅ Fetched {len(formatted_bars)} bars for {symbol} from {start_date} to {end_date or 'now'}")
+            return formatted_bars
             
-            # Convert ET to UTC for Alpaca API (requires UTC with 'Z' suffix)
-            import pytz
-            utc_tz = pytz.UTC
-            start_dt_utc = start_dt.astimezone(utc_tz)
-            end_dt_utc = end_dt.astimezone(utc_tz)
+        except requests.HTTPError:
+            # Already reported by _iter_alpaca_bars; never cache a partial day
+            return []
+        except Exception as e:
+            print(f"Error fetching bars from Alpaca for {symbol}: {e}")
+            return []
+    
+    def _iter_alpaca_bars(self, symbol: str, start_str: str, end_str: str) -> Iterator[Dict[str, Any]]:
+        """
+        Yield formatted 5-minute bars for one symbol, following next_page_token
+        
+        Args:
+            symbol: Stock symbol
+            start_str: UTC start in ISO 8601 with 'Z' suffix
+            end_str: UTC end in ISO 8601 with 'Z' suffix
+        
+        Raises:
+            requests.HTTPError: If any page request fails
+        """
+        # Build API request
+        url = f"{self.base_url}/stocks/{symbol}/bars"
+        params = {
+            "timeframe": "5Min",
+            "start": start_str,
+            "end": end_str,
+            "limit": 10000,
+            "adjustment": "split",
+            "feed": "iex"
+        }
+        
+        while True:
+            response = self._get(url, params=params)
+            if response.status_code != 200:
+                print(f"Alpaca API error for {symbol}: {response.status_code} - {response.text}")
+                raise requests.HTTPError(f"{response.status_code} for {symbol}", response=response)
             
-            # Format as ISO 8601 with 'Z' suffix (e.g., "2024-01-03T00:00:00Z")
-            start_str = start_dt_utc.strftime("%Y-%m-%dT%H:%M:%SZ")
-            end_str = end_dt_utc.strftime("%Y-%m-%dT%H:%M:%SZ")
+            data = response.json()
+            for bar in data.get("bars") or ():
+                yield self._format_bar(bar)
             
-            # Build API request
-            url = f"{self.base_url}/stocks/{symbol}/bars"
+            page_token = data.get("next_page_token")
+            if not page_token:
+                return
+            params["page_token"] = page_token
+    
+    def _fetch_from_alpaca_multi(
+        self,
+        symbols: List[str],
+        start_date: str,
+        end_date: Optional[str] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Fetch 5-minute bars for several symbols with Alpaca's multi-symbol bars endpoint
+        
+        One request (plus pagination) replaces one request per symbol.
+        
+        Args:
+            symbols: Stock symbols (keep to ~50 per call so the URL stays short)
+            start_date: Start date in 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS' format
+            end_date: End date in 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS' format (optional)
+        
+        Returns:
+            Dictionary mapping symbol to list of bar data (symbols without bars are omitted)
+        """
+        if not self.api_key or not self.api_secret:
+            print(f"Warning: Alpaca API credentials not configured")
+            return {}
+        
+        result: Dict[str, List[Dict[str, Any]]] = {}
+        try:
+            start_str, end_str = self._to_utc_range(start_date, end_date)
+            url = f"{self.base_url}/stocks/bars"
             params = {
+                "symbols": ",".join(symbols),
                 "timeframe": "5Min",
                 "start": start_str,
                 "end": end_str,
@@ -191,64 +369,29 @@ class BarCacheManager:
                 "feed": "iex"
             }
             
-            headers = {
-                "APCA-API-KEY-ID": self.api_key,
-                "APCA-API-SECRET-KEY": self.api_secret,
-            }
-            
-            response = requests.get(url, headers=headers, params=params)
-            
-            if response.status_code != 200:
-                print(f"Alpaca API error for {symbol}: {response.status_code} - {response.text}")
-                return []
-            
-            data = response.json()
-            bars = data.get("bars", [])
-            
-            # Debug: Check if bars is None or empty
-            if bars is None or len(bars) == 0:
-                print(f"⚠️  No bars returned for {symbol}")
-                print(f"   Request: {start_str} to {end_str}")
-                print(f"   Response keys: {list(data.keys())}")
-                if bars is None:
-                    print(f"   bars = None (likely no data for this time range)")
-                else:
-                    print(f"   bars = [] (empty array)")
-                return []
-            
-            # Format bars
-            formatted_bars = []
-            for bar in bars:
-                formatted = {
-                    "timestamp": bar["t"],
-                    "t": bar["t"],
-                    "open": bar["o"],
-                    "o": bar["o"],
-                    "high": bar["h"],
-                    "h": bar["h"],
-                    "low": bar["l"],
-                    "l": bar["l"],
-                    "close": bar["c"],
-                    "c": bar["c"],
-                    "volume": bar["v"],
-                    "v": bar["v"],
-                }
-                trade_count = bar.get("n")
-                if trade_count is not None:
-                    formatted["trade_count"] = trade_count
-                    formatted["n"] = trade_count
-                vwap_val = bar.get("vw")
-                if vwap_val is not None:
-                    formatted["vwap"] = vwap_val
-                    formatted["vw"] = vwap_val
-                formatted_bars.append(formatted)
-            
-            print(f"✅ Fetched {len(formatted_bars)} bars for {symbol} from {start_date} to {end_date or 'now'}")
-            return formatted_bars
-            
+            # The limit applies across all symbols, so follow next_page_token
+            while True:
+                response = self._get(url, params=params)
+                if response.status_code != 200:
+                    print(f"Alpaca API error for {','.join(symbols)}: {response.status_code} - {response.text}")
+                    # Never cache a partial day from an interrupted pagination
+                    return {}
+                
+                data = response.json()
+                for symbol, bars in (data.get("bars") or {}).items():
+                    result.setdefault(symbol, []).extend(self._format_bar(bar) for bar in bars)
+                
+                page_token = data.get("next_page_token")
+                if not page_token:
+                    break
+                params["page_token"] = page_token
         except Exception as e:
-            print(f"Error fetching bars from Alpaca for {symbol}: {e}")
-            return []
+            print(f"Error fetching bars from Alpaca for {','.join(symbols)}: {e}")
+            # Same as a failed page: drop whatever pages arrived before the error
+            return {}
+        
+        print(f"✅ Fetched bars for {len(result)}/{len(symbols)} symbols from {start_date} to {end_date or 'now'}")
+        return result
     
     def get_day_bars(
         self, 
@@ -284,6 +427,13 @@ class BarCacheManager:
         
         return bars
     
+    @staticmethod
+    def _next_bar_time(bars: List[Dict[str, Any]]) -> datetime:
+        """ET time at which the bar after the last one in bars is expected"""
+        # Parse UTC timestamp and convert to ET
+        last_dt_utc = datetime.fromisoformat(bars[-1]["timestamp"].replace('Z', '+00:00'))
+        return last_dt_utc.astimezone(_ET) + timedelta(minutes=5)
+    
     def get_today_bars(self, symbol: str) -> List[Dict[str, Any]]:
         """
         Get today's 5-minute bars from market open until now
@@ -295,6 +445,16 @@ class BarCacheManager:
         Returns:
             List of bar data for today
         """
+        # Within the current 5-minute window no new bar can exist, so answer from
+        # memory without touching the cache file
+        tip = self._today_tip.get(symbol)
+        if tip is not None:
+            next_dt_et, tip_bars = tip
+            now_et = datetime.now(_ET)
+            if now_et < next_dt_et:
+                print(f"📦 No new bars yet (next expected at {next_dt_et.strftime('%H:%M')} ET, now is {now_et.strftime('%H:%M')} ET)")
+                return list(tip_bars)
+        
         today = datetime.now().strftime("%Y-%m-%d")
         
         # Load existing today's data from cache
@@ -304,20 +464,15 @@ class BarCacheManager:
         
         # Determine last timestamp we have
         if existing_bars:
-            last_timestamp = existing_bars[-1]["timestamp"]
-            # Parse UTC timestamp and convert to ET
-            last_dt_utc = datetime.fromisoformat(last_timestamp.replace('Z', '+00:00'))
-            import pytz
-            et_tz = pytz.timezone('US/Eastern')
-            last_dt_et = last_dt_utc.astimezone(et_tz)
             # Fetch only new bars after last cached timestamp
-            next_dt_et = last_dt_et + timedelta(minutes=5)
+            next_dt_et = self._next_bar_time(existing_bars)
             
             # Check if next bar time is in the future - if so, no new bars to fetch
-            now_et = datetime.now(et_tz)
+            now_et = datetime.now(_ET)
             if next_dt_et > now_et:
                 print(f"📦 No new bars yet (next expected at {next_dt_et.strftime('%H:%M')} ET, now is {now_et.strftime('%H:%M')} ET)")
-                return existing_bars
+                self._today_tip[symbol] = (next_dt_et, existing_bars)
+                return list(existing_bars)
             
             start_time = next_dt_et.strftime("%Y-%m-%d %H:%M:%S")
             print(f"📦 Appending new bars for {symbol} from {start_time} ET")
@@ -329,14 +484,18 @@ class BarCacheManager:
         # Fetch new bars
         new_bars = self._fetch_from_alpaca(symbol, start_time, None)
         
+        if not new_bars:
+            # Nothing arrived: keep the file (and its parsed-cache entry) untouched
+            return existing_bars
+        
         # Combine existing and new bars
         all_today_bars = existing_bars + new_bars
         
         # Save updated today's data to cache
-        if all_today_bars:
-            self._save_day_cache(symbol, today, all_today_bars)
+        self._save_day_cache(symbol, today, all_today_bars)
+        self._today_tip[symbol] = (self._next_bar_time(all_today_bars), all_today_bars)
         
-        return all_today_bars
+        return list(all_today_bars)
     
     def get_yesterday_bars(self, symbol: str) -> List[Dict[str, Any]]:
         """
@@ -386,9 +545,37 @@ class BarCacheManager:
             days: Number of days to cache (default 2 - yesterday and today)
         """
         print(f"🔄 Preloading cache for {len(symbols)} symbols ({days} days)...")
-        for symbol in symbols:
-            print(f"\n📊 Processing {symbol}...")
-            self.get_recent_days_bars(symbol, days)
+        
+        # Same dates as get_recent_days_bars: today, then previous trading days
+        dates = []
+        current_date = datetime.now()
+        for i in range(days):
+            dates.append(current_date.strftime("%Y-%m-%d"))
+            current_date = self._get_previous_trading_day(current_date)
+        
+        # One batched request per chunk of symbols instead of one per symbol
+        jobs = []
+        for date_str in dates:
+            # Days already cached with bars are not re-downloaded; empty caches (e.g. written
+            # during an API outage) are fetched again so preloading repairs them
+            missing = [symbol for symbol in symbols if not self._load_day_cache(symbol, date_str)]
+            if not missing:
+                print(f"📦 Using cached data for all symbols on {date_str}")
+                continue
+            print(f"\n🌐 Fetching {len(missing)} symbols for {date_str} from Alpaca API")
+            for i in range(0, len(missing), _MULTI_FETCH_CHUNK):
+                jobs.append((missing[i:i + _MULTI_FETCH_CHUNK], date_str))
+        
+        def fetch_and_save(chunk: List[str], date_str: str) -> None:
+            for symbol, bars in self._fetch_from_alpaca_multi(chunk, date_str, date_str).items():
+                if bars:
+                    self._save_day_cache(symbol, date_str, bars)
+        
+        # The chunks are independent network-bound requests, so run them concurrently
+        if jobs:
+            with ThreadPoolExecutor(max_workers=min(_PRELOAD_WORKERS, len(jobs))) as executor:
+                for future in [executor.submit(fetch_and_save, chunk, date_str) for chunk, date_str in jobs]:
+                    future.result()
         print(f"\n✅ Cache preload complete!")
     
     def get_cache_stats(self, symbol: str) -> Dict[str, Any]:
@@ -414,21 +601,22 @@ class BarCacheManager:
             date = date_file.stem  # e.g., "2025-11-10"
             days_cached.append(date)
             
-            # Load and count bars
-            bars = self._load_day_cache(symbol, date)
-            if bars:
-                total_bars += len(bars)
+            # One (cached) parse per file gives both the bar count and last_updated
+            try:
+                st = date_file.stat()
+                data = _read_day_cache_file(str(date_file), st.st_mtime_ns, st.st_size)
+            except Exception as e:
+                print(f"Error loading cache for {symbol} on {date}: {e}")
+                continue
+            
+            # Count bars
+            total_bars += len(data.get("bars") or [])
             
             # Track latest update
-            try:
-                with open(date_file, 'r') as f:
-                    data = json.load(f)
-                    last_updated = data.get("last_updated")
-                    if last_updated:
-                        if latest_update is None or last_updated > latest_update:
-                            latest_update = last_updated
-            except:
-                pass
+            last_updated = data.get("last_updated")
+            if last_updated:
+                if latest_update is None or last_updated > latest_update:
+                    latest_update = last_updated
         
         return {
             "symbol": symbol,
@@ -1,31 +1,111 @@
 import json
+import mmap
 import os
 from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Iterator, Union
+from typing import Any, Dict, Iterator, Optional, Union
 
 try:
     import fcntl  # type: ignore
 except ImportError:  # pragma: no cover
     fcntl = None  # Windows fallback – locking will be best-effort only
 
+try:
+    import orjson  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover
+    orjson = None  # optional: faster serialization and zero-copy parsing of large mmapped files
+
+# Files at least this large are parsed from an mmap instead of read into memory
+_MMAP_MIN_BYTES = 64 * 1024
+
 from dotenv import load_dotenv
 
-load_dotenv()
+
+def ensure_dotenv() -> None:
+    """Load .env once per process tree.
+
+    The marker is inherited by child processes (MCP services, live agent
+    subprocesses), which already received the loaded variables from the parent.
+    """
+    if os.environ.get("_DOTENV_LOADED"):
+        return
+    load_dotenv()
+    os.environ["_DOTENV_LOADED"] = "1"
+
+
+ensure_dotenv()
+
+# RUNTIME_ENV_PATH value -> resolved absolute path (parent directory already created)
+_RUNTIME_ENV_PATHS: Dict[str, str] = {}
+
+# File name of a per-agent runtime env file (see set_runtime_env_path)
+RUNTIME_ENV_FILENAME = ".runtime_env.json"
+# HTTP header an agent's MCP client uses to tell the tool services which runtime env
+# file holds its SIGNATURE/TODAY_DATE/... (read by tools.mcp_runtime_env)
+RUNTIME_ENV_HEADER = "X-Runtime-Env-Path"
+
+# Runtime env file of the current agent run, overriding RUNTIME_ENV_PATH. A context
+# variable rather than an environment variable, so several agents running as
+# concurrent asyncio tasks in one process each keep their own runtime state.
+_RUNTIME_ENV_PATH_VAR: ContextVar[Optional[str]] = ContextVar("runtime_env_path", default=None)
+
+
+def set_runtime_env_path(path: Optional[Union[str, Path]]):
+    """Use path as the runtime env file for the current task (None restores RUNTIME_ENV_PATH).
+
+    Returns:
+        Token for reset_runtime_env_path.
+    """
+    return _RUNTIME_ENV_PATH_VAR.set(str(path) if path else None)
+
+
+def reset_runtime_env_path(token) -> None:
+    _RUNTIME_ENV_PATH_VAR.reset(token)
+
+
+def with_runtime_env_headers(mcp_config: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Return mcp_config with the current task's runtime env file attached to every HTTP connection.
+
+    Without a per-task runtime env file the config is returned unchanged, and the
+    tool services keep using the shared RUNTIME_ENV_PATH file.
+    """
+    path = _RUNTIME_ENV_PATH_VAR.get()
+    if not path:
+        return mcp_config
+    resolved = _resolve_runtime_env_path()
+    config = {}
+    for name, connection in mcp_config.items():
+        if connection.get("transport") in ("streamable_http", "sse"):
+            connection = {
+                **connection,
+                "headers": {**(connection.get("headers") or {}), RUNTIME_ENV_HEADER: resolved},
+            }
+        config[name] = connection
+    return config
+
 
 def _resolve_runtime_env_path() -> str:
     """Resolve runtime env path from RUNTIME_ENV_PATH in .env file.
     
     Simple strategy:
-    1. Read RUNTIME_ENV_PATH from environment (.env file)
-    2. If relative path, resolve from project root
-    3. Return the path (will be created by write_config_value if needed)
+    1. Use the current task's runtime env file if one is set (set_runtime_env_path)
+    2. Otherwise read RUNTIME_ENV_PATH from environment (.env file)
+    3. If relative path, resolve from project root
+    4. Return the path (will be created by write_config_value if needed)
+
+    The resolved path is memoized per raw path value, so the parent
+    directory is created once rather than on every config lookup.
     """
-    path = os.environ.get("RUNTIME_ENV_PATH")
-    
-    if not path:
-        # Fallback to default if not set
-        path = "data/.runtime_env.json"
+    raw_path = _RUNTIME_ENV_PATH_VAR.get() or os.environ.get("RUNTIME_ENV_PATH") or ""
+    cached = _RUNTIME_ENV_PATHS.get(raw_path)
+    if cached is not None:
+        return cached
+
+    # Fallback to default if not set
+    path = raw_path or "data/.runtime_env.json"
     
     # If relative path, resolve from project root
     if not os.path.isabs(path):
@@ -34,7 +114,8 @@ def _resolve_runtime_env_path() -> str:
     
     # Ensure directory exists
     Path(path).parent.mkdir(parents=True, exist_ok=True)
-    
+
+    _RUNTIME_ENV_PATHS[raw_path] = path
     return path
 
 
@@ -43,7 +124,7 @@ def _locked_file(path: str, mode: str) -> Iterator:
     """
     Open a file with an advisory lock (POSIX). Falls back silently if fcntl is unavailable.
     """
-    file_obj = open(path, mode, encoding="utf-8")
+    file_obj = open(path, mode) if "b" in mode else open(path, mode, encoding="utf-8")
     locked = False
     if fcntl is not None:
         try:
@@ -63,13 +144,27 @@ def _locked_file(path: str, mode: str) -> Iterator:
         file_obj.close()
 
 
+def _load_json_from_binary_file(f) -> Any:
+    """Parse JSON from a file opened in binary mode.
+
+    Large files are parsed straight from an mmap (zero-copy with orjson); small
+    ones are read in a single call, which is cheaper than setting up a mapping.
+    """
+    size = os.fstat(f.fileno()).st_size
+    if orjson is not None and size >= _MMAP_MIN_BYTES:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                return orjson.loads(view)
+    return json.loads(f.read())
+
+
 def _safe_load_json_file(path: str) -> Dict[str, Any]:
-    if not os.path.exists(path):
-        return {}
+    # No shared lock needed: writers replace the file atomically (see write_config_value),
+    # so a reader always sees either the old or the new complete file
     try:
-        with _locked_file(path, "r") as f:
+        with open(path, "rb") as f:
             try:
-                data = json.load(f)
+                data = _load_json_from_binary_file(f)
                 return data if isinstance(data, dict) else {}
             except json.JSONDecodeError:
                 return {}
@@ -79,11 +174,69 @@ def _safe_load_json_file(path: str) -> Dict[str, Any]:
         return {}
 
 
+def _atomic_write_bytes(path: str, payload: bytes) -> None:
+    """Durably replace path with payload: write a temp file, fsync, then rename over path."""
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        try:
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    # Persist the rename itself (not supported on every platform)
+    try:
+        dir_fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def _dumps_runtime_env(runtime_env: Dict[str, Any]) -> bytes:
+    """Serialize the runtime env straight to bytes, using orjson when available."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(runtime_env, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # a value orjson cannot encode; let json report or handle it
+    return json.dumps(runtime_env, ensure_ascii=False, indent=4).encode("utf-8")
+
+
+# Runtime env file path -> ((mtime_ns, size, inode), parsed contents) of its last read
+_RUNTIME_ENV_CACHE: Dict[str, tuple] = {}
+
+
 def _load_runtime_env() -> dict:
+    """Return the parsed runtime env, re-reading the file only when its stat changes.
+
+    The returned dict is shared; callers must not mutate it.
+    """
     path = _resolve_runtime_env_path()
-    if path is None:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
         return {}
-    return _safe_load_json_file(path)
+    stat_key = (st.st_mtime_ns, st.st_size, st.st_ino)
+    cached = _RUNTIME_ENV_CACHE.get(path)
+    if cached is not None and cached[0] == stat_key:
+        return cached[1]
+    data = _safe_load_json_file(path)
+    _RUNTIME_ENV_CACHE[path] = (stat_key, data)
+    return data
 
 
 def get_config_value(key: str, default=None):
@@ -94,31 +247,96 @@ def get_config_value(key: str, default=None):
     return os.getenv(key, default)
 
 
-def write_config_value(key: str, value: Any):
-    path = _resolve_runtime_env_path()
-    if path is None:
-        print(f"⚠️  WARNING: RUNTIME_ENV_PATH not set, config value '{key}' not persisted")
+def write_config_values(values: Dict[str, Any]) -> None:
+    """Persist several runtime env keys with a single locked read-modify-write.
+
+    Each write replaces and fsyncs the whole snapshot, so updating related keys
+    together (e.g. TODAY_DATE and SIGNATURE) costs one flush instead of one per key.
+    """
+    if not values:
         return
-    runtime_env = _safe_load_json_file(path)
-    runtime_env[key] = value
+    path = _resolve_runtime_env_path()
     try:
-        with _locked_file(path, "a+") as f:
-            f.seek(0)
-            f.truncate()
-            json.dump(runtime_env, f, ensure_ascii=False, indent=4)
-            f.flush()
-            try:
-                os.fsync(f.fileno())
-            except Exception:
-                pass
+        # Writers serialize their read-modify-write on a sidecar lock file; the data file
+        # itself is replaced atomically, so readers never observe a truncated file
+        with _locked_file(path + ".lock", "a+"):
+            runtime_env = _safe_load_json_file(path)
+            runtime_env.update(values)
+            _atomic_write_bytes(path, _dumps_runtime_env(runtime_env))
     except Exception as e:
         print(f"❌ Error writing config to {path}: {e}")
     else:
-        # Mirror the value into process environment for immediate availability
+        # Force the next read to re-parse (mtime may not tick for back-to-back writes)
+        _RUNTIME_ENV_CACHE.pop(path, None)
+        # A per-task runtime env file belongs to one of possibly several concurrent
+        # agents, so its values must not leak into the process-wide environment
+        if _RUNTIME_ENV_PATH_VAR.get():
+            return
+        # Mirror the values into process environment for immediate availability
+        for key, value in values.items():
+            try:
+                os.environ[str(key)] = str(value)
+            except Exception:
+                pass
+
+
+def write_config_value(key: str, value: Any):
+    write_config_values({key: value})
+
+
+@lru_cache(maxsize=1024)
+def parse_datetime(value: str) -> datetime:
+    """Parse an ISO 8601, "YYYY-MM-DD HH:MM:SS" or "YYYY-MM-DD" string.
+
+    Results are cached since the same trading timestamps are parsed repeatedly.
+
+    Raises:
+        ValueError: If the string matches none of the supported formats.
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
         try:
-            os.environ[str(key)] = str(value)
-        except Exception:
-            pass
+            return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            return datetime.strptime(value, "%Y-%m-%d")
+
+
+def _get_field(obj, key, default=None):
+    if isinstance(obj, dict):
+        return obj.get(key, default)
+    return getattr(obj, key, default)
+
+
+def _attr_get(obj, key, default=None):
+    return getattr(obj, key, default)
+
+
+def _message_getter(messages):
+    """Pick one field getter for a whole message list.
+
+    Messages are normally uniform (all dicts from JSON payloads, or all LangChain
+    message objects), so the per-access isinstance check in _get_field can be
+    decided once; mixed lists keep the generic getter.
+    """
+    if not messages:
+        return _get_field
+    if isinstance(messages[0], dict):
+        return dict.get if all(isinstance(msg, dict) for msg in messages) else _get_field
+    return _attr_get if not any(isinstance(msg, dict) for msg in messages) else _get_field
+
+
+def _finish_reason(msg):
+    """Specialized response_metadata.finish_reason lookup (the one nested path read per message)."""
+    if isinstance(msg, dict):
+        metadata = msg.get("response_metadata")
+    else:
+        metadata = getattr(msg, "response_metadata", None)
+    if metadata is None:
+        return None
+    if isinstance(metadata, dict):
+        return metadata.get("finish_reason")
+    return getattr(metadata, "finish_reason", None)
 
 
 def extract_conversation(conversation: dict, output_type: str):
@@ -132,37 +350,29 @@ def extract_conversation(conversation: dict, output_type: str):
         For 'final': the final assistant content string if found, otherwise None.
         For 'all': the original messages list (or empty list if missing).
     """
-
-    def get_field(obj, key, default=None):
-        if isinstance(obj, dict):
-            return obj.get(key, default)
-        return getattr(obj, key, default)
-
-    def get_nested(obj, path, default=None):
-        current = obj
-        for key in path:
-            current = get_field(current, key, None)
-            if current is None:
-                return default
-        return current
-
-    messages = get_field(conversation, "messages", []) or []
+    messages = _get_field(conversation, "messages", []) or []
 
     if output_type == "all":
         return messages
 
     if output_type == "final":
-        # Prefer the last message with finish_reason == 'stop' and non-empty content.
+        get = _message_getter(messages)
+        # Single reverse pass: prefer the last message with finish_reason == 'stop' and
+        # non-empty content; otherwise fall back to the last AI-like message with
+        # non-empty content that is not a tool call.
+        fallback = None
         for msg in reversed(messages):
-            finish_reason = get_nested(msg, ["response_metadata", "finish_reason"])
-            content = get_field(msg, "content")
-            if finish_reason == "stop" and isinstance(content, str) and content.strip():
+            content = get(msg, "content")
+            if not (isinstance(content, str) and content.strip()):
+                continue
+
+            if _finish_reason(msg) == "stop":
                 return content
 
-        # Fallback: last AI-like message with non-empty content and not a tool call.
-        for msg in reversed(messages):
-            content = get_field(msg, "content")
-            additional_kwargs = get_field(msg, "additional_kwargs", {}) or {}
+            if fallback is not None:
+                continue
+
+            additional_kwargs = get(msg, "additional_kwargs", {}) or {}
             tool_calls = None
             if isinstance(additional_kwargs, dict):
                 tool_calls = additional_kwargs.get("tool_calls")
@@ -171,14 +381,14 @@ def extract_conversation(conversation: dict, output_type: str):
 
             is_tool_invoke = isinstance(tool_calls, list)
             # Tool messages often have 'tool_call_id' or 'name' (tool name)
-            has_tool_call_id = get_field(msg, "tool_call_id") is not None
-            tool_name = get_field(msg, "name")
+            has_tool_call_id = get(msg, "tool_call_id") is not None
+            tool_name = get(msg, "name")
             is_tool_message = has_tool_call_id or isinstance(tool_name, str)
 
-            if not is_tool_invoke and not is_tool_message and isinstance(content, str) and content.strip():
-                return content
+            if not is_tool_invoke and not is_tool_message:
+                fallback = content
 
-        return None
+        return fallback
 
     raise ValueError("output_type must be 'final' or 'all'")
 
@@ -192,26 +402,13 @@ def extract_tool_messages(conversation: dict):
 
     Supports both dict-based and object-based messages.
     """
-
-    def get_field(obj, key, default=None):
-        if isinstance(obj, dict):
-            return obj.get(key, default)
-        return getattr(obj, key, default)
-
-    def get_nested(obj, path, default=None):
-        current = obj
-        for key in path:
-            current = get_field(current, key, None)
-            if current is None:
-                return default
-        return current
-
-    messages = get_field(conversation, "messages", []) or []
+    messages = _get_field(conversation, "messages", []) or []
+    get = _message_getter(messages)
     tool_messages = []
     for msg in messages:
-        tool_call_id = get_field(msg, "tool_call_id")
-        name = get_field(msg, "name")
-        finish_reason = get_nested(msg, ["response_metadata", "finish_reason"])  # present for AIMessage
+        tool_call_id = get(msg, "tool_call_id")
+        name = get(msg, "name")
+        finish_reason = _finish_reason(msg)  # present for AIMessage
         # Treat as ToolMessage if it carries a tool_call_id, or looks like a tool response
         if tool_call_id or (isinstance(name, str) and not finish_reason):
             tool_messages.append(msg)
@@ -230,11 +427,21 @@ def extract_first_tool_message_content(conversation: dict):
     return getattr(first, "content", None)
 
 
+@lru_cache(maxsize=32)
+def _read_json_file_cached(path_str: str, mtime_ns: int, size: int):
+    with open(path_str, "rb") as f:
+        return _load_json_from_binary_file(f)
+
+
 def read_json_file(path: Union[str, os.PathLike]):
-    """Read JSON file from disk and return parsed object."""
+    """Read JSON file from disk and return parsed object.
+
+    Parsed results are cached per (path, mtime, size), so re-reading an unchanged
+    file costs one stat; treat the returned object as read-only.
+    """
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        st = os.stat(path)
+        return _read_json_file_cached(os.fspath(path), st.st_mtime_ns, st.st_size)
     except FileNotFoundError:
         raise FileNotFoundError(f"JSON file not found: {path}") from None
     except json.JSONDecodeError as exc:
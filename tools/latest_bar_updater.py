@@ -5,16 +5,25 @@ from __future__ import annotations
 
 import json
 import os
+import shutil
 import signal
 import sys
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
+from zoneinfo import ZoneInfo
 
-import pytz
 import requests
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover
+    orjson = None  # optional: faster payload serialization
 
 # Ensure project root is on sys.path so we can import helper utilities
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
@@ -22,20 +31,49 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 # Late import after manipulating sys.path
-from tools.general_tools import read_json_file  # noqa: E402
+from tools.general_tools import ensure_dotenv, read_json_file  # noqa: E402
 
-load_dotenv()
+ensure_dotenv()
 
 ALPACA_API_KEY = os.getenv("ALPACA_API_KEY")
 ALPACA_API_SECRET = os.getenv("ALPACA_API_SECRET")
 ALPACA_BASE_URL = "https://data.alpaca.markets/v2"
+_LATEST_BARS_URL = f"{ALPACA_BASE_URL}/stocks/bars/latest"
 DEFAULT_CONFIG_PATH = PROJECT_ROOT / "configs" / "default_5min_config.json"
 CACHE_DIRS = [
     PROJECT_ROOT / "data" / "price_cache_5min" / "latest",
     PROJECT_ROOT / "docs" / "data" / "price_cache_5min" / "latest",
 ]
+LATEST_MANIFEST_FILENAME = "_ALL.json"
 POLL_INTERVAL_SECONDS = int(os.getenv("ALPACA_LATEST_POLL_INTERVAL", "60"))
-ET_TZ = pytz.timezone("US/Eastern")
+# zoneinfo is C-accelerated and reads the system tz database; built once per process
+ET_TZ = ZoneInfo("America/New_York")
+
+# Set by the signal handler; the poll loop waits on it instead of sleeping
+_STOP = threading.Event()
+
+# symbol -> (t, c, v) of the bar last written to the cache dirs
+_LAST_BAR_KEY: Dict[str, Tuple] = {}
+# symbol -> bar last written to the cache dirs (contents of the combined manifest)
+_PUBLISHED_BARS: Dict[str, Dict] = {}
+
+# Shared pool for the per-symbol cache file writes
+_WRITE_POOL = ThreadPoolExecutor(max_workers=min(8, len(CACHE_DIRS) * 4))
+
+# One keep-alive session for every poll, so steady-state polls skip the TCP/TLS handshake
+_SESSION = requests.Session()
+_SESSION.headers.update({
+    "APCA-API-KEY-ID": ALPACA_API_KEY or "",
+    "APCA-API-SECRET-KEY": ALPACA_API_SECRET or "",
+})
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=4,
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504]),
+    ),
+)
 
 
 def load_symbols(config_path: Path) -> List[str]:
@@ -46,17 +84,16 @@ def load_symbols(config_path: Path) -> List[str]:
     return symbols
 
 
+@lru_cache(maxsize=8)
+def _latest_bars_params(symbols: Tuple[str, ...]) -> Dict[str, str]:
+    # The symbol list is fixed for the poller's lifetime, so the query params are
+    # built once and reused by every poll (auth headers already live on _SESSION)
+    return {"symbols": ",".join(symbols), "feed": "iex"}
+
+
 def fetch_latest_bars(symbols: List[str]) -> Dict[str, Dict]:
-    url = f"{ALPACA_BASE_URL}/stocks/bars/latest"
-    params = {
-        "symbols": ",".join(symbols),
-        "feed": "iex",
-    }
-    headers = {
-        "APCA-API-KEY-ID": ALPACA_API_KEY or "",
-        "APCA-API-SECRET-KEY": ALPACA_API_SECRET or "",
-    }
-    response = requests.get(url, headers=headers, params=params, timeout=10)
+    params = _latest_bars_params(tuple(symbols))
+    response = _SESSION.get(_LATEST_BARS_URL, params=params, timeout=10)
     if response.status_code != 200:
         raise RuntimeError(
             f"Alpaca latest bars API error: {response.status_code} - {response.text}"
@@ -70,35 +107,91 @@ def ensure_cache_dirs() -> None:
         cache_dir.mkdir(parents=True, exist_ok=True)
 
 
+def _dumps_payload(payload: Dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def _atomic_write(target: Path, data: bytes) -> None:
+    tmp = target.with_name(f".{target.name}.tmp.{os.getpid()}")
+    tmp.write_bytes(data)
+    os.replace(tmp, target)
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    """Publish src at dst as a hardlink (no second write), copying across filesystems."""
+    tmp = dst.with_name(f".{dst.name}.tmp.{os.getpid()}")
+    try:
+        tmp.unlink()
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src, tmp)
+    except OSError:  # EXDEV, or links unsupported by the filesystem
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+def _publish(filename: str, data: bytes) -> None:
+    # Write once into the primary cache dir, then hardlink the same file into the
+    # others; both steps are atomic renames, so readers never see a partial file
+    primary_file = CACHE_DIRS[0] / filename
+    _atomic_write(primary_file, data)
+    for cache_dir in CACHE_DIRS[1:]:
+        _link_or_copy(primary_file, cache_dir / filename)
+
+
+def _publish_symbol_file(task: Tuple[str, Dict, Tuple, bytes]) -> None:
+    symbol, bar, bar_key, data = task
+    _publish(f"{symbol.upper()}.json", data)
+    # Recorded only after a successful publish, so a failed write is retried next tick
+    _LAST_BAR_KEY[symbol] = bar_key
+    _PUBLISHED_BARS[symbol] = bar
+
+
+def _bar_key(bar: Dict) -> Tuple:
+    # Timestamp, close and volume are what change when the latest bar advances or updates
+    return (bar.get("t"), bar.get("c"), bar.get("v"))
+
+
 def store_latest_bars(bars: Dict[str, Dict]) -> None:
     ensure_cache_dirs()
     fetched_at = datetime.now(timezone.utc)
     fetched_at_et = fetched_at.astimezone(ET_TZ)
+    # One meta dict per tick, shared by every symbol's payload
     meta = {
         "fetched_at_utc": fetched_at.isoformat(),
         "fetched_at_et": fetched_at_et.isoformat(),
     }
+    tasks = []
     for symbol, bar in bars.items():
         if not bar:
             continue
-        payload = {
-            "symbol": symbol,
-            "bar": bar,
-            "meta": meta,
-        }
-        for cache_dir in CACHE_DIRS:
-            target_file = cache_dir / f"{symbol.upper()}.json"
-            with target_file.open("w", encoding="utf-8") as fh:
-                json.dump(payload, fh, ensure_ascii=False, indent=2)
-
-
-def poll(symbols: List[str]) -> None:
+        bar_key = _bar_key(bar)
+        # Quiet periods (after hours, illiquid names) return the same bar every poll;
+        # leave the files alone rather than rewriting identical data
+        if _LAST_BAR_KEY.get(symbol) == bar_key:
+            continue
+        tasks.append((symbol, bar, bar_key, _dumps_payload({"symbol": symbol, "bar": bar, "meta": meta})))
+    if not tasks:
+        return
+    # Per-symbol writes are independent and release the GIL around file I/O,
+    # so run them concurrently
+    for _ in _WRITE_POOL.map(_publish_symbol_file, tasks):
+        pass
+    # Combined manifest of every symbol's latest bar, so a consumer can pick up the
+    # whole universe with one read; the per-symbol files remain for the frontend
+    _publish(LATEST_MANIFEST_FILENAME, _dumps_payload({"meta": meta, "bars": dict(_PUBLISHED_BARS)}))
+
+
+def poll(symbols: List[str], stop_event: threading.Event = _STOP) -> None:
     print(
         f"📈 Starting Alpaca latest-bar poller for {len(symbols)} symbols: {', '.join(symbols)}"
     )
     print(f"   ➜ Poll interval: {POLL_INTERVAL_SECONDS} seconds")
 
-    while True:
+    while not stop_event.is_set():
         try:
             bars = fetch_latest_bars(symbols)
             if not bars:
@@ -115,7 +208,9 @@ def poll(symbols: List[str]) -> None:
         except Exception as exc:  # noqa: BLE001
             print(f"❌ Failed to update latest bars: {exc}")
 
-        time.sleep(POLL_INTERVAL_SECONDS)
+        # Returns as soon as a stop signal sets the event, instead of sleeping out the interval
+        if stop_event.wait(POLL_INTERVAL_SECONDS):
+            return
 
 
 def main(config_path: Path = DEFAULT_CONFIG_PATH) -> None:
@@ -123,22 +218,16 @@ def main(config_path: Path = DEFAULT_CONFIG_PATH) -> None:
         raise RuntimeError("ALPACA_API_KEY and ALPACA_API_SECRET must be set")
 
     symbols = load_symbols(config_path)
-    stop_requested = False
 
     def handle_signal(signum, frame):  # noqa: ARG001
-        nonlocal stop_requested
-        stop_requested = True
+        _STOP.set()
         print("\n🛑 Latest-bar poller received stop signal. Exiting...")
 
     signal.signal(signal.SIGINT, handle_signal)
     signal.signal(signal.SIGTERM, handle_signal)
 
     try:
-        while not stop_requested:
-            try:
-                poll(symbols)
-            except KeyboardInterrupt:
-                stop_requested = True
+        poll(symbols, _STOP)
     finally:
         print("✅ Latest-bar poller stopped")
 
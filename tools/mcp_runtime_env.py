@@ -0,0 +1,33 @@
+"""Per-request runtime env selection for the MCP tool services.
+
+Agents running concurrently in one process each keep their SIGNATURE, TODAY_DATE,
+LOG_PATH, ... in their own runtime env file and send its path with every MCP request
+(see tools.general_tools.with_runtime_env_headers). This middleware makes the tool
+call read and write that file instead of the shared RUNTIME_ENV_PATH file.
+"""
+
+import os
+
+from fastmcp.server.dependencies import get_http_headers
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+
+from tools.general_tools import (RUNTIME_ENV_FILENAME, RUNTIME_ENV_HEADER,
+                                 reset_runtime_env_path, set_runtime_env_path)
+
+_HEADER_KEY = RUNTIME_ENV_HEADER.lower()
+
+
+class RuntimeEnvMiddleware(Middleware):
+    """Bind the caller's runtime env file for the duration of each tool call."""
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        path = get_http_headers().get(_HEADER_KEY)
+        # Only runtime env files are accepted, so a request cannot redirect
+        # config writes (e.g. IF_TRADE) to an arbitrary file
+        if not path or not os.path.isabs(path) or os.path.basename(path) != RUNTIME_ENV_FILENAME:
+            return await call_next(context)
+        token = set_runtime_env_path(path)
+        try:
+            return await call_next(context)
+        finally:
+            reset_runtime_env_path(token)
@@ -1,20 +1,38 @@
-import os
-
-from dotenv import load_dotenv
-
-load_dotenv()
+import asyncio
 import json
+import mmap
+import operator
+import os
+import re
 import sys
-from datetime import datetime, timedelta
+import threading
+from bisect import bisect_left
+from collections import deque
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, FrozenSet, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
 
-# 将项目根目录加入 Python 路径，便于从子目录直接运行本文件
-project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-if project_root not in sys.path:
-    sys.path.insert(0, project_root)
+try:
+    import orjson  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover
+    orjson = None  # 可选依赖：更快的 JSON 解析
+
+try:
+    from numba import njit  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover
+    njit = None  # 可选依赖：编译 get_yesterday_profit 的计算内核
+
+from prompts.symbols import (NASDAQ_100_SYMBOL_SET, SSE_50_SYMBOL_SET,
+                             all_nasdaq_100_symbols, all_sse_50_symbols)
+# .env 由 general_tools 在导入时通过 ensure_dotenv() 加载（每个进程树只解析一次）
 from tools.general_tools import get_config_value
 
+# 项目根目录，导入时解析一次（resolve() 需要系统调用）
+_BASE_DIR = Path(__file__).resolve().parents[1]
+
 
 def get_market_type() -> str:
     """
@@ -40,164 +58,16 @@ def get_market_type() -> str:
     return "us"
 
 
-all_nasdaq_100_symbols = [
-    "NVDA",
-    "MSFT",
-    "AAPL",
-    "GOOG",
-    "GOOGL",
-    "AMZN",
-    "META",
-    "AVGO",
-    "TSLA",
-    "NFLX",
-    "PLTR",
-    "COST",
-    "ASML",
-    "AMD",
-    "CSCO",
-    "AZN",
-    "TMUS",
-    "MU",
-    "LIN",
-    "PEP",
-    "SHOP",
-    "APP",
-    "INTU",
-    "AMAT",
-    "LRCX",
-    "PDD",
-    "QCOM",
-    "ARM",
-    "INTC",
-    "BKNG",
-    "AMGN",
-    "TXN",
-    "ISRG",
-    "GILD",
-    "KLAC",
-    "PANW",
-    "ADBE",
-    "HON",
-    "CRWD",
-    "CEG",
-    "ADI",
-    "ADP",
-    "DASH",
-    "CMCSA",
-    "VRTX",
-    "MELI",
-    "SBUX",
-    "CDNS",
-    "ORLY",
-    "SNPS",
-    "MSTR",
-    "MDLZ",
-    "ABNB",
-    "MRVL",
-    "CTAS",
-    "TRI",
-    "MAR",
-    "MNST",
-    "CSX",
-    "ADSK",
-    "PYPL",
-    "FTNT",
-    "AEP",
-    "WDAY",
-    "REGN",
-    "ROP",
-    "NXPI",
-    "DDOG",
-    "AXON",
-    "ROST",
-    "IDXX",
-    "EA",
-    "PCAR",
-    "FAST",
-    "EXC",
-    "TTWO",
-    "XEL",
-    "ZS",
-    "PAYX",
-    "WBD",
-    "BKR",
-    "CPRT",
-    "CCEP",
-    "FANG",
-    "TEAM",
-    "CHTR",
-    "KDP",
-    "MCHP",
-    "GEHC",
-    "VRSK",
-    "CTSH",
-    "CSGP",
-    "KHC",
-    "ODFL",
-    "DXCM",
-    "TTD",
-    "ON",
-    "BIIB",
-    "LULU",
-    "CDW",
-    "GFS",
-]
-
-all_sse_50_symbols = [
-    "600519.SH",
-    "601318.SH",
-    "600036.SH",
-    "601899.SH",
-    "600900.SH",
-    "601166.SH",
-    "600276.SH",
-    "600030.SH",
-    "603259.SH",
-    "688981.SH",
-    "688256.SH",
-    "601398.SH",
-    "688041.SH",
-    "601211.SH",
-    "601288.SH",
-    "601328.SH",
-    "688008.SH",
-    "600887.SH",
-    "600150.SH",
-    "601816.SH",
-    "601127.SH",
-    "600031.SH",
-    "688012.SH",
-    "603501.SH",
-    "601088.SH",
-    "600309.SH",
-    "601601.SH",
-    "601668.SH",
-    "603993.SH",
-    "601012.SH",
-    "601728.SH",
-    "600690.SH",
-    "600809.SH",
-    "600941.SH",
-    "600406.SH",
-    "601857.SH",
-    "601766.SH",
-    "601919.SH",
-    "600050.SH",
-    "600760.SH",
-    "601225.SH",
-    "600028.SH",
-    "601988.SH",
-    "688111.SH",
-    "601985.SH",
-    "601888.SH",
-    "601628.SH",
-    "601600.SH",
-    "601658.SH",
-    "600048.SH",
-]
+def _symbol_set(symbols) -> frozenset:
+    """Membership set for symbols, reusing the precomputed set for a full universe."""
+    if symbols is all_nasdaq_100_symbols:
+        return NASDAQ_100_SYMBOL_SET
+    if symbols is all_sse_50_symbols:
+        return SSE_50_SYMBOL_SET
+    return frozenset(symbols)
 
 
+@lru_cache(maxsize=None)
 def get_merged_file_path(market: str = "us") -> Path:
     """Get merged.jsonl path based on market type.
 
@@ -207,11 +77,213 @@ def get_merged_file_path(market: str = "us") -> Path:
     Returns:
         Path object pointing to the merged.jsonl file
     """
-    base_dir = Path(__file__).resolve().parents[1]
     if market == "cn":
-        return base_dir / "data" / "A_stock" / "merged.jsonl"
+        return _BASE_DIR / "data" / "A_stock" / "merged.jsonl"
     else:
-        return base_dir / "data" / "merged.jsonl"
+        return _BASE_DIR / "data" / "merged.jsonl"
+
+
+class _SeriesColumns(NamedTuple):
+    """单只股票时间序列的列式存储：每根 bar 占一行，价格列为连续的 float64 数组。"""
+    rows: Dict[str, int]  # 时间戳 -> 行号（仅包含值为 dict 的 bar）
+    buy: np.ndarray  # "1. buy price"；缺失或无法转换为 NaN
+    sell: np.ndarray  # "4. sell price"；缺失或无法转换为 NaN
+    pair_ok: np.ndarray  # bool；买入价与卖出价都能转换（缺失视为可转换）
+
+
+def _to_price(value) -> Tuple[float, bool]:
+    """返回 (价格, 是否可转换)；None 记为 (NaN, True)，无法转换记为 (NaN, False)。"""
+    if value is None:
+        return np.nan, True
+    try:
+        return float(value), True
+    except Exception:
+        return np.nan, False
+
+
+def _build_series_columns(series: Dict[str, Dict]) -> _SeriesColumns:
+    rows: Dict[str, int] = {}
+    buy = []
+    sell = []
+    pair_ok = []
+    for ts, bar in series.items():
+        if not isinstance(bar, dict):
+            continue
+        rows[ts] = len(buy)
+        buy_price, buy_ok = _to_price(bar.get("1. buy price"))
+        sell_price, sell_ok = _to_price(bar.get("4. sell price"))
+        buy.append(buy_price)
+        sell.append(sell_price)
+        pair_ok.append(buy_ok and sell_ok)
+    return _SeriesColumns(
+        rows,
+        np.array(buy, dtype=np.float64),
+        np.array(sell, dtype=np.float64),
+        np.array(pair_ok, dtype=bool),
+    )
+
+
+def _price_at(column: np.ndarray, row: int) -> Optional[float]:
+    value = column.item(row)
+    return None if value != value else value  # NaN -> None
+
+
+class _MergedIndex(NamedTuple):
+    """merged.jsonl 解析结果（只读共享，调用方不可修改）"""
+    series: Dict[str, _SeriesColumns]  # symbol -> 第一个 "Time Series*" 字段的列式存储
+    names: Dict[str, str]  # symbol -> 名称
+    daily_dates: FrozenSet[str]  # 所有 "Time Series (Daily)" 的日期
+    trading_days: Tuple[str, ...]  # daily_dates 升序排列
+    intraday_times: List[datetime]  # "YYYY-MM-DD HH:MM:SS" 格式时间戳解析后的并集（升序，供 bisect）
+
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _parse_intraday_ts(ts: str) -> datetime:
+    """解析 "YYYY-MM-DD HH:MM:SS"，等价于 datetime.strptime(ts, "%Y-%m-%d %H:%M:%S")。
+
+    标准格式按固定偏移切片直接构造 datetime，省去 strptime 的格式串解析（约快 2 倍）；
+    其他写法交给 strptime 处理（包括抛出 ValueError）。
+    """
+    if (
+        len(ts) == 19
+        and ts[4] == "-" and ts[7] == "-" and ts[10] == " " and ts[13] == ":" and ts[16] == ":"
+    ):
+        digits = ts[0:4] + ts[5:7] + ts[8:10] + ts[11:13] + ts[14:16] + ts[17:19]
+        if digits.isascii() and digits.isdigit():
+            return datetime(
+                int(ts[0:4]), int(ts[5:7]), int(ts[8:10]), int(ts[11:13]), int(ts[14:16]), int(ts[17:19])
+            )
+    return datetime.strptime(ts, "%Y-%m-%d %H:%M:%S")
+
+
+def _iter_jsonl_docs(path_str: str) -> Iterator:
+    """逐行解码 jsonl 文件，跳过空行与无法解析的行。
+
+    有 orjson 时直接在 mmap 上按换行符切分，把 memoryview 切片交给 orjson 解码，
+    省去读缓冲区拷贝和 str 解码；否则整体读入后交给 json。
+    """
+    with open(path_str, "rb") as f:
+        if orjson is None or os.fstat(f.fileno()).st_size == 0:
+            for line in f.read().split(b"\n"):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:  # json.JSONDecodeError
+                    continue
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            size = len(mm)
+            start = 0
+            while start < size:
+                end = mm.find(b"\n", start)
+                if end < 0:
+                    end = size
+                line = view[start:end]
+                start = end + 1
+                if not line or line == b"\r":
+                    continue
+                try:
+                    doc = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue
+                finally:
+                    line.release()
+                yield doc
+
+
+@lru_cache(maxsize=4)
+def _parse_merged(path_str: str, mtime_ns: int, size: int) -> _MergedIndex:
+    """一次性解析整个 merged.jsonl。mtime_ns / size 仅用作缓存键，文件更新后自动失效。"""
+    series_by_symbol: Dict[str, _SeriesColumns] = {}
+    names: Dict[str, str] = {}
+    daily_dates = set()
+    timestamps = set()
+
+    for doc in _iter_jsonl_docs(path_str):
+        if not isinstance(doc, dict):
+            continue
+
+        daily = doc.get("Time Series (Daily)")
+        if isinstance(daily, dict):
+            daily_dates.update(daily)
+
+        # 查找第一个以 "Time Series" 开头的键
+        series = None
+        for key, value in doc.items():
+            if key.startswith("Time Series"):
+                series = value
+                break
+        if isinstance(series, dict):
+            timestamps.update(series)
+
+        meta = doc.get("Meta Data", {})
+        symbol = meta.get("2. Symbol") if isinstance(meta, dict) else None
+        if not symbol:
+            continue
+        if isinstance(symbol, str):
+            symbol = sys.intern(symbol)  # 与 prompts.symbols 中的代码共享同一对象，成员判断更快
+        name = meta.get("2.1. Name", "")
+        if name:
+            names[symbol] = name
+        if isinstance(series, dict):
+            # 只保留列式价格数据，原始 bar 字典随 doc 一起释放
+            series_by_symbol[symbol] = _build_series_columns(series)
+
+    # 每个唯一时间戳只解析一次；纯日期等其他格式不参与 get_yesterday_date 的查找
+    intraday_times = []
+    for ts_str in timestamps:
+        try:
+            intraday_times.append(_parse_intraday_ts(ts_str))
+        except (TypeError, ValueError):
+            continue
+    intraday_times.sort()
+
+    return _MergedIndex(
+        series_by_symbol, names, frozenset(daily_dates), tuple(sorted(daily_dates)), intraday_times
+    )
+
+
+# aget_* 包装在多个工作线程中并发查询；lru_cache 不会合并并发的未命中，
+# 加锁保证冷启动时只有一个线程解析文件，其余线程等待后直接命中缓存
+_MERGED_PARSE_LOCK = threading.Lock()
+
+
+# 路径 -> (mtime_ns, size, 最近一次解析得到的索引)，用于判断索引是否已就绪而不触发解析
+_MERGED_PARSED: Dict[str, Tuple[int, int, _MergedIndex]] = {}
+
+
+def _load_merged(merged_file: Path) -> Optional[_MergedIndex]:
+    """返回 merged.jsonl 的缓存索引；文件不存在时返回 None。重复调用只需一次 stat。"""
+    try:
+        st = merged_file.stat()
+    except FileNotFoundError:
+        return None
+    path_str = str(merged_file)
+    with _MERGED_PARSE_LOCK:
+        index = _parse_merged(path_str, st.st_mtime_ns, st.st_size)
+    _MERGED_PARSED[path_str] = (st.st_mtime_ns, st.st_size, index)
+    return index
+
+
+def _parsed_merged_or_none(merged_file: Path, st: os.stat_result) -> Optional[_MergedIndex]:
+    """文件未变化且已解析过时返回缓存索引，否则返回 None（不会触发解析）。"""
+    entry = _MERGED_PARSED.get(str(merged_file))
+    if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+        return entry[2]
+    return None
+
+
+def _file_contains(path: Path, needle: bytes) -> bool:
+    """在文件原始字节中查找 needle（mmap + find，底层为 memchr/memmem，无需 JSON 解码）。"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return False
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm.find(needle) != -1
 
 
 def is_trading_day(date: str, market: str = "us") -> bool:
@@ -226,28 +298,52 @@ def is_trading_day(date: str, market: str = "us") -> bool:
     """
     merged_file_path = get_merged_file_path(market)
 
-    if not merged_file_path.exists():
+    try:
+        st = merged_file_path.stat()
+    except FileNotFoundError:
         print(f"⚠️  Warning: {merged_file_path} not found, cannot validate trading day")
         return False
 
     try:
-        with open(merged_file_path, "r", encoding="utf-8") as f:
-            # Read first line to check if date exists
-            for line in f:
-                try:
-                    data = json.loads(line.strip())
-                    time_series = data.get("Time Series (Daily)", {})
-                    if date in time_series:
-                        return True
-                except json.JSONDecodeError:
-                    continue
-            # If we get here, checked all stocks and date was not found in any
-            return False
+        index = _parsed_merged_or_none(merged_file_path, st)
+        if index is not None:
+            return date in index.daily_dates
+        # 索引尚未解析（冷启动的一次性查询）时直接扫描原始字节，避免为一个日期解码整个文件。
+        # merged.jsonl 由 json.dumps 生成，日K 日期键的写法固定为 "YYYY-MM-DD":，
+        # 小时线时间戳带时分秒、Meta Data 中的日期后接逗号，都不会匹配
+        return _file_contains(merged_file_path, f'"{date}":'.encode())
     except Exception as e:
         print(f"⚠️  Error checking trading day: {e}")
         return False
 
 
+def get_trading_day_set(market: str = "us") -> FrozenSet[str]:
+    """Get the set of trading days in merged.jsonl for repeated membership checks.
+
+    Unlike calling is_trading_day per date, the file is stat'ed once, so a loop over
+    a date range only pays one set lookup per date.
+
+    Args:
+        market: Market type ("us" or "cn")
+
+    Returns:
+        Frozen set of trading dates in "YYYY-MM-DD" format (empty if unavailable)
+    """
+    merged_file_path = get_merged_file_path(market)
+
+    try:
+        index = _load_merged(merged_file_path)
+    except Exception as e:
+        print(f"⚠️  Error reading trading days: {e}")
+        return frozenset()
+
+    if index is None:
+        print(f"⚠️  Warning: {merged_file_path} not found, cannot validate trading days")
+        return frozenset()
+
+    return index.daily_dates
+
+
 def get_all_trading_days(market: str = "us") -> List[str]:
     """Get all available trading days from merged.jsonl.
 
@@ -259,26 +355,18 @@ def get_all_trading_days(market: str = "us") -> List[str]:
     """
     merged_file_path = get_merged_file_path(market)
 
-    if not merged_file_path.exists():
-        print(f"⚠️  Warning: {merged_file_path} not found")
-        return []
-
-    trading_days = set()
     try:
-        with open(merged_file_path, "r", encoding="utf-8") as f:
-            for line in f:
-                try:
-                    data = json.loads(line.strip())
-                    time_series = data.get("Time Series (Daily)", {})
-                    # Add all dates from this stock's time series
-                    trading_days.update(time_series.keys())
-                except json.JSONDecodeError:
-                    continue
-        return sorted(list(trading_days))
+        index = _load_merged(merged_file_path)
     except Exception as e:
         print(f"⚠️  Error reading trading days: {e}")
         return []
 
+    if index is None:
+        print(f"⚠️  Warning: {merged_file_path} not found")
+        return []
+
+    return list(index.trading_days)
+
 
 def get_stock_name_mapping(market: str = "us") -> Dict[str, str]:
     """Get mapping from stock symbols to names.
@@ -289,29 +377,22 @@ def get_stock_name_mapping(market: str = "us") -> Dict[str, str]:
     Returns:
         Dictionary mapping symbols to names, e.g. {"600519.SH": "贵州茅台"}
     """
-    merged_file_path = get_merged_file_path(market)
+    return dict(_stock_name_map(market))
 
-    if not merged_file_path.exists():
-        return {}
 
-    name_map = {}
+def _stock_name_map(market: str) -> Dict[str, str]:
+    """Shared symbol -> name map from the cached merged.jsonl index (read-only)."""
     try:
-        with open(merged_file_path, "r", encoding="utf-8") as f:
-            for line in f:
-                try:
-                    data = json.loads(line.strip())
-                    meta = data.get("Meta Data", {})
-                    symbol = meta.get("2. Symbol")
-                    name = meta.get("2.1. Name", "")
-                    if symbol and name:
-                        name_map[symbol] = name
-                except json.JSONDecodeError:
-                    continue
-        return name_map
+        index = _load_merged(get_merged_file_path(market))
     except Exception as e:
         print(f"⚠️  Error reading stock names: {e}")
         return {}
 
+    if index is None:
+        return {}
+
+    return index.names
+
 
 def format_price_dict_with_names(
     price_dict: Dict[str, Optional[float]], market: str = "us"
@@ -329,7 +410,7 @@ def format_price_dict_with_names(
     if market != "cn":
         return price_dict
 
-    name_map = get_stock_name_mapping(market)
+    name_map = _stock_name_map(market)
     if not name_map:
         return price_dict
 
@@ -362,6 +443,17 @@ def get_yesterday_date(today_date: str, merged_path: Optional[str] = None, marke
     Returns:
         yesterday_date: 上一个交易日或时间点的字符串，格式与输入一致。
     """
+    # 获取 merged.jsonl 文件路径
+    if merged_path is None:
+        merged_file = get_merged_file_path(market)
+    else:
+        merged_file = Path(merged_path)
+
+    return _yesterday_date_from_index(today_date, _load_merged(merged_file), merged_file)
+
+
+def _yesterday_date_from_index(today_date: str, index: Optional[_MergedIndex], merged_file: Path) -> str:
+    """get_yesterday_date 的核心逻辑，直接使用已加载的索引（index 为 None 表示文件不存在）。"""
     # 解析输入日期/时间 - handle both old format and ISO 8601
     try:
         # Try ISO 8601 format first (e.g., "2025-11-07T12:53:09-05:00")
@@ -380,13 +472,7 @@ def get_yesterday_date(today_date: str, merged_path: Optional[str] = None, marke
             input_dt = datetime.strptime(today_date, "%Y-%m-%d")
             date_only = True
     
-    # 获取 merged.jsonl 文件路径
-    if merged_path is None:
-        merged_file = get_merged_file_path(market)
-    else:
-        merged_file = Path(merged_path)
-    
-    if not merged_file.exists():
+    if index is None:
         # 如果文件不存在，根据输入类型回退
         print(f"merged.jsonl file does not exist at {merged_file}")
         if date_only:
@@ -398,46 +484,14 @@ def get_yesterday_date(today_date: str, merged_path: Optional[str] = None, marke
             yesterday_dt = input_dt - timedelta(hours=1)
             return yesterday_dt.strftime("%Y-%m-%d %H:%M:%S")
     
-    # 从 merged.jsonl 读取所有可用的交易时间
-    all_timestamps = set()
-    
-    with merged_file.open("r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
-                continue
-            try:
-                doc = json.loads(line)
-                # 查找所有以 "Time Series" 开头的键
-                for key, value in doc.items():
-                    if key.startswith("Time Series"):
-                        if isinstance(value, dict):
-                            all_timestamps.update(value.keys())
-                        break
-            except Exception:
-                continue
-    
-    if not all_timestamps:
-        # 如果没有找到任何时间戳，根据输入类型回退
-        if date_only:
-            yesterday_dt = input_dt - timedelta(days=1)
-            while yesterday_dt.weekday() >= 5:
-                yesterday_dt -= timedelta(days=1)
-            return yesterday_dt.strftime("%Y-%m-%d")
-        else:
-            yesterday_dt = input_dt - timedelta(hours=1)
-            return yesterday_dt.strftime("%Y-%m-%d %H:%M:%S")
-    
-    # 将所有时间戳转换为 datetime 对象，并找到小于 today_date 的最大时间戳
+    # 在已缓存的有序时间列表中二分查找小于 today_date 的最大时间戳
+    # （市场时间戳不带时区，无法与带时区的输入比较，此时按未找到处理）
     previous_timestamp = None
-    
-    for ts_str in all_timestamps:
-        try:
-            ts_dt = datetime.strptime(ts_str, "%Y-%m-%d %H:%M:%S")
-            if ts_dt < input_dt:
-                if previous_timestamp is None or ts_dt > previous_timestamp:
-                    previous_timestamp = ts_dt
-        except Exception:
-            continue
+    times = index.intraday_times
+    if input_dt.tzinfo is None:
+        idx = bisect_left(times, input_dt)
+        if idx > 0:
+            previous_timestamp = times[idx - 1]
     
     # 如果没有找到更早的时间戳，根据输入类型回退
     if previous_timestamp is None:
@@ -472,7 +526,7 @@ def get_open_prices(
     Returns:
         {symbol_price: open_price 或 None} 的字典；若未找到对应日期或标的，则值为 None。
     """
-    wanted = set(symbols)
+    wanted = _symbol_set(symbols)
     results: Dict[str, Optional[float]] = {}
 
     if merged_path is None:
@@ -480,57 +534,48 @@ def get_open_prices(
     else:
         merged_file = Path(merged_path)
 
-    if not merged_file.exists():
+    index = _load_merged(merged_file)
+    if index is None:
         return results
 
-    with merged_file.open("r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
-                continue
-            try:
-                doc = json.loads(line)
-            except Exception:
-                continue
-            meta = doc.get("Meta Data", {}) if isinstance(doc, dict) else {}
-            sym = meta.get("2. Symbol")
-            if sym not in wanted:
-                continue
-            # 查找所有以 "Time Series" 开头的键
-            series = None
-            for key, value in doc.items():
-                if key.startswith("Time Series"):
-                    series = value
-                    break
-            if not isinstance(series, dict):
-                continue
-            bar = series.get(today_date)
-            
-            if isinstance(bar, dict):
-                open_val = bar.get("1. buy price")
-                
-                try:
-                    results[f"{sym}_price"] = float(open_val) if open_val is not None else None
-                except Exception:
-                    results[f"{sym}_price"] = None
+    for sym, columns in index.series.items():
+        if sym not in wanted:
+            continue
+        row = columns.rows.get(today_date)
+        
+        if row is not None:
+            # 缺失或无法转换的开盘价均为 None
+            results[f"{sym}_price"] = _price_at(columns.buy, row)
 
     return results
 
 
 def get_yesterday_open_and_close_price(
-    today_date: str, symbols: List[str], merged_path: Optional[str] = None, market: str = "us"
-) -> Tuple[Dict[str, Optional[float]], Dict[str, Optional[float]]]:
+    today_date: str,
+    symbols: List[str],
+    merged_path: Optional[str] = None,
+    market: str = "us",
+    return_yesterday_date: bool = False,
+) -> Union[
+    Tuple[Dict[str, Optional[float]], Dict[str, Optional[float]]],
+    Tuple[Dict[str, Optional[float]], Dict[str, Optional[float]], Optional[str]],
+]:
     """从 data/merged.jsonl 中读取指定日期与股票的昨日买入价和卖出价。
 
+    上一交易日的查找与价格读取共用同一份已缓存的 merged.jsonl 索引，只需一次加载。
+
     Args:
         today_date: 日期字符串，格式 YYYY-MM-DD，代表今天日期。
         symbols: 需要查询的股票代码列表。
         merged_path: 可选，自定义 merged.jsonl 路径；默认读取项目根目录下 data/merged.jsonl。
         market: 市场类型，"us" 为美股，"cn" 为A股
+        return_yesterday_date: 为 True 时额外返回所用的上一交易日，省去单独调用 get_yesterday_date。
 
     Returns:
         (买入价字典, 卖出价字典) 的元组；若未找到对应日期或标的，则值为 None。
+        return_yesterday_date=True 时返回 (买入价字典, 卖出价字典, 上一交易日)，文件不存在时上一交易日为 None。
     """
-    wanted = set(symbols)
+    wanted = _symbol_set(symbols)
     buy_results: Dict[str, Optional[float]] = {}
     sell_results: Dict[str, Optional[float]] = {}
 
@@ -539,87 +584,88 @@ def get_yesterday_open_and_close_price(
     else:
         merged_file = Path(merged_path)
 
-    if not merged_file.exists():
+    index = _load_merged(merged_file)
+    if index is None:
+        if return_yesterday_date:
+            return buy_results, sell_results, None
         return buy_results, sell_results
 
-    yesterday_date = get_yesterday_date(today_date, merged_path=merged_path, market=market)
-
-    with merged_file.open("r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
-                continue
-            try:
-                doc = json.loads(line)
-            except Exception:
-                continue
-            meta = doc.get("Meta Data", {}) if isinstance(doc, dict) else {}
-            sym = meta.get("2. Symbol")
-            if sym not in wanted:
-                continue
-            # 查找所有以 "Time Series" 开头的键
-            series = None
-            for key, value in doc.items():
-                if key.startswith("Time Series"):
-                    series = value
-                    break
-            if not isinstance(series, dict):
-                continue
+    yesterday_date = _yesterday_date_from_index(today_date, index, merged_file)
 
-            # 尝试获取昨日买入价和卖出价
-            bar = series.get(yesterday_date)
-            if isinstance(bar, dict):
-                buy_val = bar.get("1. buy price")  # 买入价字段
-                sell_val = bar.get("4. sell price")  # 卖出价字段
+    for sym, columns in index.series.items():
+        if sym not in wanted:
+            continue
 
-                try:
-                    buy_price = float(buy_val) if buy_val is not None else None
-                    sell_price = float(sell_val) if sell_val is not None else None
-                    buy_results[f"{sym}_price"] = buy_price
-                    sell_results[f"{sym}_price"] = sell_price
-                except Exception:
-                    buy_results[f"{sym}_price"] = None
-                    sell_results[f"{sym}_price"] = None
+        # 尝试获取昨日买入价和卖出价
+        row = columns.rows.get(yesterday_date)
+        if row is not None:
+            if columns.pair_ok[row]:
+                buy_results[f"{sym}_price"] = _price_at(columns.buy, row)  # 买入价字段
+                sell_results[f"{sym}_price"] = _price_at(columns.sell, row)  # 卖出价字段
             else:
-                # 如果昨日没有数据，尝试向前查找最近的交易日
-                # raise ValueError(f"No data found for {sym} on {yesterday_date}")
-                # print(f"No data found for {sym} on {yesterday_date}")
-                buy_results[f'{sym}_price'] = None
-                sell_results[f'{sym}_price'] = None
-                # today_dt = datetime.strptime(today_date, "%Y-%m-%d")
-                # yesterday_dt = today_dt - timedelta(days=1)
-                # current_date = yesterday_dt
-                # found_data = False
+                # 任一价格无法转换时两者都记为 None
+                buy_results[f"{sym}_price"] = None
+                sell_results[f"{sym}_price"] = None
+        else:
+            # 如果昨日没有数据，尝试向前查找最近的交易日
+            # raise ValueError(f"No data found for {sym} on {yesterday_date}")
+            # print(f"No data found for {sym} on {yesterday_date}")
+            buy_results[f'{sym}_price'] = None
+            sell_results[f'{sym}_price'] = None
+            # today_dt = datetime.strptime(today_date, "%Y-%m-%d")
+            # yesterday_dt = today_dt - timedelta(days=1)
+            # current_date = yesterday_dt
+            # found_data = False
+            
+            # # 最多向前查找5个交易日
+            # for _ in range(5):
+            #     current_date -= timedelta(days=1)
+            #     # 跳过周末
+            #     while current_date.weekday() >= 5:
+            #         current_date -= timedelta(days=1)
                 
-                # # 最多向前查找5个交易日
-                # for _ in range(5):
-                #     current_date -= timedelta(days=1)
-                #     # 跳过周末
-                #     while current_date.weekday() >= 5:
-                #         current_date -= timedelta(days=1)
+            #     check_date = current_date.strftime("%Y-%m-%d")
+            #     bar = series.get(check_date)
+            #     if isinstance(bar, dict):
+            #         buy_val = bar.get("1. buy price")
+            #         sell_val = bar.get("4. sell price")
                     
-                #     check_date = current_date.strftime("%Y-%m-%d")
-                #     bar = series.get(check_date)
-                #     if isinstance(bar, dict):
-                #         buy_val = bar.get("1. buy price")
-                #         sell_val = bar.get("4. sell price")
-                        
-                #         try:
-                #             buy_price = float(buy_val) if buy_val is not None else None
-                #             sell_price = float(sell_val) if sell_val is not None else None
-                #             buy_results[f'{sym}_price'] = buy_price
-                #             sell_results[f'{sym}_price'] = sell_price
-                #             found_data = True
-                #             break
-                #         except Exception:
-                #             continue
-                
-                # if not found_data:
-                #     buy_results[f'{sym}_price'] = None
-                #     sell_results[f'{sym}_price'] = None
+            #         try:
+            #             buy_price = float(buy_val) if buy_val is not None else None
+            #             sell_price = float(sell_val) if sell_val is not None else None
+            #             buy_results[f'{sym}_price'] = buy_price
+            #             sell_results[f'{sym}_price'] = sell_price
+            #             found_data = True
+            #             break
+            #         except Exception:
+            #             continue
+            
+            # if not found_data:
+            #     buy_results[f'{sym}_price'] = None
+            #     sell_results[f'{sym}_price'] = None
 
+    if return_yesterday_date:
+        return buy_results, sell_results, yesterday_date
     return buy_results, sell_results
 
 
+def _profit_kernel_py(buy: np.ndarray, sell: np.ndarray, weights: np.ndarray, out: np.ndarray) -> None:
+    """逐元素计算 (sell - buy) * weight，价格为 NaN 或无持仓时写入 0.0（供 numba 编译）。"""
+    for i in range(buy.shape[0]):
+        b = buy[i]
+        s = sell[i]
+        w = weights[i]
+        # 不使用 fastmath：它假定不存在 NaN，会让下面的缺失价格判断失效
+        if w > 0 and b == b and s == s:
+            out[i] = (s - b) * w
+        else:
+            out[i] = 0.0
+
+
+# 安装了 numba 时编译为单次循环，免去 numpy 多次广播与临时数组；否则使用 numpy 向量化实现
+_profit_kernel = njit(cache=True)(_profit_kernel_py) if njit is not None else None
+
+
 def get_yesterday_profit(
     today_date: str,
     yesterday_buy_prices: Dict[str, Optional[float]],
@@ -639,29 +685,33 @@ def get_yesterday_profit(
     Returns:
         {symbol: profit} 的字典；若未找到对应日期或标的，则值为 0.0。
     """
-    profit_dict = {}
-
     # 使用传入的股票列表或默认的纳斯达克100列表
     if stock_symbols is None:
         stock_symbols = all_nasdaq_100_symbols
 
-    # 遍历所有股票代码
-    for symbol in stock_symbols:
-        symbol_price_key = f"{symbol}_price"
-
-        # 获取昨日开盘价和收盘价
-        buy_price = yesterday_buy_prices.get(symbol_price_key)
-        sell_price = yesterday_sell_prices.get(symbol_price_key)
-
-        # 获取昨日持仓权重
-        position_weight = yesterday_init_position.get(symbol, 0.0)
-
-        # 计算收益：(收盘价 - 开盘价) * 持仓权重
-        if buy_price is not None and sell_price is not None and position_weight > 0:
-            profit = (sell_price - buy_price) * position_weight
-            profit_dict[symbol] = round(profit, 4)  # 保留4位小数
-        else:
-            profit_dict[symbol] = 0.0
+    symbols = list(stock_symbols)
+    count = len(symbols)
+    price_keys = [f"{symbol}_price" for symbol in symbols]
+
+    # 按 symbols 顺序对齐成数组，缺失价格记为 NaN
+    def _aligned(prices: Dict[str, Optional[float]]) -> np.ndarray:
+        values = (prices.get(key) for key in price_keys)
+        return np.fromiter((np.nan if v is None else v for v in values), dtype=np.float64, count=count)
+
+    buy = _aligned(yesterday_buy_prices)
+    sell = _aligned(yesterday_sell_prices)
+    weights = np.fromiter(
+        (yesterday_init_position.get(symbol, 0.0) for symbol in symbols), dtype=np.float64, count=count
+    )
+
+    # 计算收益：(收盘价 - 开盘价) * 持仓权重；价格缺失或无持仓时为 0.0
+    if _profit_kernel is not None:
+        profit = np.empty(count, dtype=np.float64)
+        _profit_kernel(buy, sell, weights, profit)
+    else:
+        valid = (weights > 0) & ~np.isnan(buy) & ~np.isnan(sell)
+        profit = np.where(valid, (sell - buy) * weights, 0.0)
+    profit_dict = dict(zip(symbols, np.round(profit, 4).tolist()))  # 保留4位小数
 
     return profit_dict
 
@@ -679,47 +729,51 @@ def get_today_init_position(today_date: str, signature: str) -> Dict[str, float]
     """
     from tools.general_tools import get_config_value
 
-    base_dir = Path(__file__).resolve().parents[1]
-
     # Get log_path from config, default to "agent_data" for backward compatibility
     log_path = get_config_value("LOG_PATH", "./data/agent_data")
     if log_path.startswith("./data/"):
         log_path = log_path[7:]  # Remove "./data/" prefix
 
-    position_file = base_dir / "data" / log_path / signature / "position" / "position.jsonl"
-#     position_file = base_dir / "data" / "agent_data" / signature / "position" / "position.jsonl"
+    position_file = _BASE_DIR / "data" / log_path / signature / "position" / "position.jsonl"
+#     position_file = _BASE_DIR / "data" / "agent_data" / signature / "position" / "position.jsonl"
 
-    if not position_file.exists():
+    # 单次 stat 同时判断存在性并取 mtime / size（原先 exists() + stat() 两次系统调用）
+    try:
+        st = position_file.stat()
+    except FileNotFoundError:
         print(f"Position file {position_file} does not exist")
         return {}
-    
-    # 获取市场类型，智能判断
-    market = get_market_type()
-    yesterday_date = get_yesterday_date(today_date, market=market)
-    
-    max_id = -1
-    latest_positions = {}
-    all_records = []
-  
-    with position_file.open("r", encoding="utf-8") as f:
+
+    # 结果按 (日期, 签名, 文件 mtime, size) 缓存：同一 mtime 刻度内的追加也会因 size 变化而失效；
+    # 返回副本以免调用方修改缓存
+    return dict(_load_today_init_position(str(position_file), today_date, st.st_mtime_ns, st.st_size))
+
+
+@lru_cache(maxsize=256)
+def _load_today_init_position(position_file_path: str, today_date: str, mtime_ns: int, size: int) -> Dict[str, float]:
+    """扫描 position.jsonl，返回 today_date 之前最新一条记录的持仓。mtime_ns / size 仅用作缓存键。"""
+    latest = None
+    latest_key = None
+
+    with open(position_file_path, "rb") as f:
         for line in f:
             if not line.strip():
                 continue
             try:
-                doc = json.loads(line)
+                doc = _json_loads(line)
                 record_date = doc.get("date")
                 if record_date and record_date < today_date:
-                    all_records.append(doc)
+                    # 单次遍历取 (date, id) 最大的记录；相同键保留最先出现的一条（与原先稳定排序一致）
+                    key = (record_date, doc.get("id", 0))
+                    if latest_key is None or key > latest_key:
+                        latest, latest_key = doc, key
             except Exception:
                 continue
 
-    if not all_records:
+    if latest is None:
         return {}
 
-    # Sort by date (descending) then by id (descending) to get the most recent record
-    all_records.sort(key=lambda x: (x.get("date", ""), x.get("id", 0)), reverse=True)
-
-    return all_records[0].get("positions", {})
+    return latest.get("positions", {})
 
 
 def get_latest_position(today_date: str, signature: str) -> Tuple[Dict[str, float], int]:
@@ -739,82 +793,61 @@ def get_latest_position(today_date: str, signature: str) -> Tuple[Dict[str, floa
     """
     from tools.general_tools import get_config_value
 
-    base_dir = Path(__file__).resolve().parents[1]
-
     # Get log_path from config, default to "agent_data" for backward compatibility
     log_path = get_config_value("LOG_PATH", "./data/agent_data")
     if log_path.startswith("./data/"):
         log_path = log_path[7:]  # Remove "./data/" prefix
 
-    position_file = base_dir / "data" / log_path / signature / "position" / "position.jsonl"
+    position_file = _BASE_DIR / "data" / log_path / signature / "position" / "position.jsonl"
 
     if not position_file.exists():
         return {}, -1
 
-    # 获取市场类型，智能判断
+    # 获取市场类型，智能判断；上一交易日来自缓存的 merged.jsonl 索引，提前算好以便单次扫描
     market = get_market_type()
-    
-    # Step 1: 先查找当天的记录
+    prev_date = get_yesterday_date(today_date, market=market)
+
+    # 一次遍历同时收集：当天 id 最大的记录、上一交易日 id 最大的记录、today_date 之前 (date, id) 最大的记录
     max_id_today = -1
     latest_positions_today: Dict[str, float] = {}
-    
-    with position_file.open("r", encoding="utf-8") as f:
+    max_id_prev = -1
+    latest_positions_prev: Dict[str, float] = {}
+    latest_before = None
+    latest_before_key = None
+
+    with position_file.open("rb") as f:
         for line in f:
             if not line.strip():
                 continue
             try:
-                doc = json.loads(line)
-                if doc.get("date") == today_date:
+                doc = _json_loads(line)
+                record_date = doc.get("date")
+                if record_date == today_date:
                     current_id = doc.get("id", -1)
                     if current_id > max_id_today:
                         max_id_today = current_id
                         latest_positions_today = doc.get("positions", {})
-            except Exception:
-                continue
-    
-    # 如果当天有记录，直接返回
-    if max_id_today >= 0 and latest_positions_today:
-        return latest_positions_today, max_id_today
-    
-    # Step 2: 当天没有记录，则回退到上一个交易日
-    prev_date = get_yesterday_date(today_date, market=market)
-    
-    max_id_prev = -1
-    latest_positions_prev: Dict[str, float] = {}
-
-    with position_file.open("r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
-                continue
-            try:
-                doc = json.loads(line)
-                if doc.get("date") == prev_date:
+                if record_date == prev_date:
                     current_id = doc.get("id", -1)
                     if current_id > max_id_prev:
                         max_id_prev = current_id
                         latest_positions_prev = doc.get("positions", {})
+                if record_date and record_date < today_date:
+                    key = (record_date, doc.get("id", 0))
+                    if latest_before_key is None or key > latest_before_key:
+                        latest_before, latest_before_key = doc, key
             except Exception:
                 continue
     
-    # 如果前一天也没有记录，尝试找文件中最新的记录（按日期和id排序）
-    if max_id_prev < 0 or not latest_positions_prev:
-        all_records = []
-        with position_file.open("r", encoding="utf-8") as f:
-            for line in f:
-                if not line.strip():
-                    continue
-                try:
-                    doc = json.loads(line)
-                    if doc.get("date") and doc.get("date") < today_date:
-                        all_records.append(doc)
-                except Exception:
-                    continue
-        
-        if all_records:
-            # 按日期和id排序，取最新的一条
-            all_records.sort(key=lambda x: (x.get("date", ""), x.get("id", 0)), reverse=True)
-            latest_positions_prev = all_records[0].get("positions", {})
-            max_id_prev = all_records[0].get("id", -1)
+    # 如果当天有记录，直接返回
+    if max_id_today >= 0 and latest_positions_today:
+        return latest_positions_today, max_id_today
+    
+    # 当天没有记录，则回退到上一个交易日；
+    # 如果前一天也没有记录，使用文件中 today_date 之前最新的记录（按日期和id）
+    if (max_id_prev < 0 or not latest_positions_prev) and latest_before is not None:
+        latest_positions_prev = latest_before.get("positions", {})
+        max_id_prev = latest_before.get("id", -1)
     
     return latest_positions_prev, max_id_prev
 
@@ -839,21 +872,46 @@ def add_no_trade_record(today_date: str, signature: str):
 
     from tools.general_tools import get_config_value
 
-    base_dir = Path(__file__).resolve().parents[1]
-
     # Get log_path from config, default to "agent_data" for backward compatibility
     log_path = get_config_value("LOG_PATH", "./data/agent_data")
     if log_path.startswith("./data/"):
         log_path = log_path[7:]  # Remove "./data/" prefix
 
-    position_file = base_dir / "data" / log_path / signature / "position" / "position.jsonl"
+    position_file = _BASE_DIR / "data" / log_path / signature / "position" / "position.jsonl"
 
-    with position_file.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(save_item) + "\n")
+    # 直接以字节追加一整行；有 orjson 时序列化更快且无需再编码
+    if orjson is not None:
+        line = orjson.dumps(save_item) + b"\n"
+    else:
+        line = (json.dumps(save_item) + "\n").encode("utf-8")
+    with position_file.open("ab") as f:
+        f.write(line)
     return
 
 
+# Async variants: the lookups above are blocking file scans, so they run in worker
+# threads and independent lookups can be awaited concurrently with asyncio.gather.
+async def aget_open_prices(
+    today_date: str, symbols: List[str], merged_path: Optional[str] = None, market: str = "us"
+) -> Dict[str, Optional[float]]:
+    """Async wrapper around get_open_prices."""
+    return await asyncio.to_thread(get_open_prices, today_date, symbols, merged_path, market)
+
+
+async def aget_yesterday_open_and_close_price(
+    today_date: str, symbols: List[str], merged_path: Optional[str] = None, market: str = "us"
+) -> Tuple[Dict[str, Optional[float]], Dict[str, Optional[float]]]:
+    """Async wrapper around get_yesterday_open_and_close_price."""
+    return await asyncio.to_thread(get_yesterday_open_and_close_price, today_date, symbols, merged_path, market)
+
+
+async def aget_today_init_position(today_date: str, signature: str) -> Dict[str, float]:
+    """Async wrapper around get_today_init_position."""
+    return await asyncio.to_thread(get_today_init_position, today_date, signature)
+
+
 if __name__ == "__main__":
+    # Run from the project root: python -m tools.price_tools
     today_date = get_config_value("TODAY_DATE")
     signature = get_config_value("SIGNATURE")
     if signature is None:
@@ -877,6 +935,99 @@ if __name__ == "__main__":
     # add_no_trade_record(today_date, signature)
 
 
+_5MIN_BARS_HEADER = (
+    "Timestamp     | Open Price | High Price | Low Price | Close Price |     Volume | Number of Trades | Volume-weighted Avg Price\n"
+    + "-" * 128
+)
+
+
+def _fmt_price(value) -> str:
+    try:
+        return f"${float(value):8.2f}"
+    except (TypeError, ValueError):
+        return "   N/A  "
+
+
+def _fmt_volume(value) -> str:
+    try:
+        return f"{int(float(value)):>12,}"
+    except (TypeError, ValueError):
+        return "     N/A"
+
+
+def _fmt_count(value) -> str:
+    try:
+        return f"{int(float(value)):>8}"
+    except (TypeError, ValueError):
+        return "    N/A"
+
+
+# Aliases per field in lookup priority order (display name first), in table column order.
+# Interned: the display names are not identifier-like, so they are not interned
+# automatically, and bars translated by prompts.agent_prompt_5min carry the interned
+# copies as keys, so lookups match on identity after the hash
+_BAR_FIELD_KEYS = tuple(
+    tuple(map(sys.intern, keys))
+    for keys in (
+        ("Open Price", "open_price", "open", "o"),
+        ("High Price", "high_price", "high", "h"),
+        ("Low Price", "low_price", "low", "l"),
+        ("Close Price", "close_price", "close", "c"),
+        ("Volume", "volume", "v"),
+        ("Number of Trades", "number_of_trades", "trade_count", "n"),
+        ("Volume-Weighted Average Price", "volume_weighted_average_price", "vwap", "vw"),
+    )
+)
+
+
+def _bar_value(bar: Dict[str, any], *keys):
+    for key in keys:
+        value = bar.get(key)
+        if value is not None and value != "Unknown":
+            return value
+    return None
+
+
+def _bar_timestamp(bar: Dict[str, any]) -> str:
+    return bar.get("timestamp", "") or bar.get("t", "") or bar.get("Timestamp", "")
+
+
+def format_5min_bar(bar: Dict[str, any]) -> str:
+    """
+    Format a single 5-minute bar as one row of the format_5min_bars table.
+
+    Args:
+        bar: Bar dictionary (raw Alpaca keys or translated display keys)
+
+    Returns:
+        Formatted table row
+    """
+    # Parse timestamp - handle both ISO format and readable format
+    timestamp = bar.get("timestamp", "") or bar.get("t", "")
+    if "T" in timestamp:
+        # Convert ISO format to readable
+        try:
+            dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+            time_str = dt.strftime("%m/%d %H:%M")
+        except:
+            time_str = timestamp[:16].replace("T", " ")
+    else:
+        time_str = timestamp
+
+    # Bars passed through translate_bar_keys carry only the display keys, so try
+    # those directly first; fall back to the alias search if any field is missing
+    get = bar.get
+    values = [get(keys[0]) for keys in _BAR_FIELD_KEYS]
+    if None in values or "Unknown" in values:
+        values = [_bar_value(bar, *keys) for keys in _BAR_FIELD_KEYS]
+    open_price, high_price, low_price, close_price, volume, num_trades, vwap = values
+
+    return (
+        f"{time_str:13} | {_fmt_price(open_price)} | {_fmt_price(high_price)} | {_fmt_price(low_price)} | "
+        f"{_fmt_price(close_price)} | {_fmt_volume(volume)} | {_fmt_count(num_trades)} | {_fmt_price(vwap)}"
+    )
+
+
 def format_5min_bars(bars: List[Dict[str, any]], max_bars: int = 50) -> str:
     """
     Format 5-minute bars data into a readable string for the agent prompt.
@@ -894,62 +1045,84 @@ def format_5min_bars(bars: List[Dict[str, any]], max_bars: int = 50) -> str:
     # Limit number of bars to avoid overwhelming the prompt
     display_bars = bars[-max_bars:] if len(bars) > max_bars else bars
     
-    def fmt_price(value):
-        try:
-            return f"${float(value):8.2f}"
-        except (TypeError, ValueError):
-            return "   N/A  "
+    return "\n".join([_5MIN_BARS_HEADER, *map(format_5min_bar, display_bars)])
 
-    def fmt_volume(value):
-        try:
-            return f"{int(float(value)):>12,}"
-        except (TypeError, ValueError):
-            return "     N/A"
 
-    def fmt_count(value):
-        try:
-            return f"{int(float(value)):>8}"
-        except (TypeError, ValueError):
-            return "    N/A"
+class FormattedBarRing:
+    """
+    Rolling window of formatted 5-minute bar rows.
 
-    lines = []
-    lines.append("Timestamp     | Open Price | High Price | Low Price | Close Price |     Volume | Number of Trades | Volume-weighted Avg Price")
-    lines.append("-" * 128)
-    
-    def get_val(bar: Dict[str, any], *keys):
-        for key in keys:
-            value = bar.get(key)
-            if value not in (None, "Unknown"):
-                return value
-        return None
-    
-    for bar in display_bars:
-        # Parse timestamp - handle both ISO format and readable format
-        timestamp = bar.get("timestamp", "") or bar.get("t", "")
-        if "T" in timestamp:
-            # Convert ISO format to readable
-            try:
-                dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-                time_str = dt.strftime("%m/%d %H:%M")
-            except:
-                time_str = timestamp[:16].replace("T", " ")
+    In live mode the bar list only grows by one bar per tick, so instead of
+    reformatting the whole list every time (as format_5min_bars does), only bars
+    newer than the last one seen are formatted and appended. render() returns the
+    same text as format_5min_bars(bars, max_bars) and is cached until new bars arrive.
+    """
+
+    def __init__(self, max_bars: int = 50):
+        self._rows = deque(maxlen=max_bars)
+        self._last_timestamp: Optional[str] = None
+        self._rendered: Optional[str] = None
+
+    def extend(self, bars: List[Dict[str, any]]) -> None:
+        """
+        Append the bars that arrived since the previous call.
+
+        Args:
+            bars: Full, time-ordered bar list for the window (e.g. today's bars so far)
+        """
+        if not bars:
+            return
+        last = self._last_timestamp
+        # Rebuild when the list no longer continues the window (first call, new day,
+        # or a list that does not overlap what was formatted before)
+        if last is None or _bar_timestamp(bars[0]) > last or _bar_timestamp(bars[-1]) < last:
+            new_bars = bars[-self._rows.maxlen:]
+            self._rows.clear()
         else:
-            time_str = timestamp
-        
-        open_price = get_val(bar, "Open Price", "open_price", "open", "o")
-        high_price = get_val(bar, "High Price", "high_price", "high", "h")
-        low_price = get_val(bar, "Low Price", "low_price", "low", "l")
-        close_price = get_val(bar, "Close Price", "close_price", "close", "c")
-        volume = get_val(bar, "Volume", "volume", "v")
-        num_trades = get_val(bar, "Number of Trades", "number_of_trades", "trade_count", "n")
-        vwap = get_val(bar, "Volume-Weighted Average Price", "volume_weighted_average_price", "vwap", "vw")
-        
-        lines.append(
-            f"{time_str:13} | {fmt_price(open_price)} | {fmt_price(high_price)} | {fmt_price(low_price)} | "
-            f"{fmt_price(close_price)} | {fmt_volume(volume)} | {fmt_count(num_trades)} | {fmt_price(vwap)}"
-        )
-    
-    return "\n".join(lines)
+            # Walk back from the newest bar until reaching one already formatted
+            start = len(bars)
+            while start > 0 and _bar_timestamp(bars[start - 1]) > last:
+                start -= 1
+            new_bars = bars[start:]
+            if not new_bars:
+                return
+        self._rows.extend(map(format_5min_bar, new_bars))
+        self._last_timestamp = _bar_timestamp(bars[-1])
+        self._rendered = None
+
+    def render(self) -> str:
+        """
+        Returns:
+            Formatted table of the window, identical to format_5min_bars output
+        """
+        if not self._rows:
+            return "No bar data available"
+        if self._rendered is None:
+            self._rendered = "\n".join([_5MIN_BARS_HEADER, *self._rows])
+        return self._rendered
+
+
+# Close-price aliases in lookup priority order (interned, see _BAR_FIELD_KEYS)
+_CLOSE_KEYS = tuple(map(sys.intern, ("Close Price", "close_price", "close", "c")))
+
+
+@lru_cache(maxsize=64)
+def _close_keys_present(keys: FrozenSet[str]) -> Tuple[str, ...]:
+    # Bars from one source share a key layout, so this is resolved once per layout
+    return tuple(key for key in _CLOSE_KEYS if key in keys)
+
+
+def _detect_close_key(bar: Dict[str, any]) -> Optional[str]:
+    """Return the alias holding the bar's close price, or None if none is usable.
+
+    Aliases are tried in _CLOSE_KEYS priority order; only those present in the bar
+    are probed, and a present alias holding None/"Unknown" falls through to the next.
+    """
+    for key in _close_keys_present(frozenset(bar)):
+        value = bar[key]
+        if value is not None and value != "Unknown":
+            return key
+    return None
 
 
 def get_5min_current_price(bars: List[Dict[str, any]]) -> Optional[float]:
@@ -967,11 +1140,26 @@ def get_5min_current_price(bars: List[Dict[str, any]]) -> Optional[float]:
     
     # Get the last bar's close price
     last_bar = bars[-1]
-    for key in ("Close Price", "close_price", "close", "c"):
-        value = last_bar.get(key)
-        if value not in (None, "Unknown"):
-            return value
-    return None
+    key = _detect_close_key(last_bar)
+    return last_bar[key] if key is not None else None
+
+
+def _bar_timestamps(bars: List[Dict[str, any]]) -> Tuple[List[str], bool]:
+    """Timestamps of the bars, and whether they are in chronological order.
+
+    ISO timestamps sort lexicographically, so the order check is a C-level map of
+    operator.le over neighbouring pairs.
+    """
+    timestamps = [bar.get("timestamp", "") for bar in bars]
+    return timestamps, all(map(operator.le, timestamps, timestamps[1:]))
+
+
+@lru_cache(maxsize=512)
+def _yesterday_of(date_str: str) -> str:
+    # Calendar day before a "YYYY-MM-DD..." prefix; callers pass the same date for
+    # every symbol/tick, so the result is cached per date
+    yd = date(int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10])) - timedelta(days=1)
+    return f"{yd.year:04d}-{yd.month:02d}-{yd.day:02d}"
 
 
 def get_5min_yesterday_close(bars: List[Dict[str, any]], current_time: str) -> Optional[float]:
@@ -990,37 +1178,46 @@ def get_5min_yesterday_close(bars: List[Dict[str, any]], current_time: str) -> O
         return None
     
     try:
-        # Parse current time to determine yesterday's date
-        current_dt = datetime.strptime(current_time, "%Y-%m-%d %H:%M:%S")
-        yesterday_date = (current_dt - timedelta(days=1)).strftime("%Y-%m-%d")
+        # Yesterday's date from the date prefix of current time (no full datetime parse)
+        yesterday_date = _yesterday_of(current_time[:10])
         
-        # Find the last bar from yesterday
-        yesterday_bars = []
-        for bar in bars:
-            timestamp = bar.get("timestamp", "")
-            if timestamp.startswith(yesterday_date):
-                yesterday_bars.append(bar)
+        # Find the last bar from yesterday. Bars normally arrive time-ordered: then bisect
+        # to the first bar past yesterday and step back one; otherwise scan from the end
+        timestamps, in_order = _bar_timestamps(bars)
+        if in_order:
+            last = bisect_left(timestamps, yesterday_date + "\x7f") - 1
+        else:
+            last = len(timestamps) - 1
+            while last >= 0 and not timestamps[last].startswith(yesterday_date):
+                last -= 1
         
-        if yesterday_bars:
-            for key in ("Close Price", "close_price", "close", "c"):
-                value = yesterday_bars[-1].get(key)
-                if value not in (None, "Unknown"):
-                    return value
+        if last >= 0 and timestamps[last].startswith(yesterday_date):
+            last_bar = bars[last]
+            key = _detect_close_key(last_bar)
+            if key is not None:
+                return last_bar[key]
         
         # If no yesterday data, return the first bar's close as fallback
-        first_bar = bars[0] if bars else None
-        if first_bar:
-            for key in ("Close Price", "close_price", "close", "c"):
-                value = first_bar.get(key)
-                if value not in (None, "Unknown"):
-                    return value
-        return None
+        # (bars is non-empty here, checked on entry)
+        first_bar = bars[0]
+        key = _detect_close_key(first_bar)
+        return first_bar[key] if key is not None else None
         
     except Exception as e:
         print(f"Error getting yesterday close: {e}")
         return None
 
 
+# Leading "YYYY-MM-DD" of a timestamp, followed by the end, "T" or a space
+_DATE_PREFIX_RE = re.compile(r"(\d{4}-\d{2}-\d{2})(?![^T ])")
+
+
+def _date_of(timestamp: str) -> str:
+    """Date prefix of a timestamp, or "" if it does not start with one."""
+    m = _DATE_PREFIX_RE.match(timestamp)
+    return m.group(1) if m else ""
+
+
 def split_bars_by_date(bars: List[Dict[str, any]], date: str) -> Tuple[List[Dict[str, any]], List[Dict[str, any]]]:
     """
     Split bars into yesterday's bars and today's bars based on a date.
@@ -1032,33 +1229,44 @@ def split_bars_by_date(bars: List[Dict[str, any]], date: str) -> Tuple[List[Dict
     Returns:
         Tuple of (yesterday_bars, today_bars)
     """
+    # Bars normally arrive in chronological order. When every timestamp has a date
+    # prefix and they are sorted (both checked in C via map), the split is a single
+    # binary search for the first bar on or after the date, and both halves are slices
+    timestamps, in_order = _bar_timestamps(bars)
+    if in_order and _date_of(date) == date and all(map(_DATE_PREFIX_RE.match, timestamps)):
+        split = bisect_left(timestamps, date)
+        return bars[:split], bars[split:]
+    
     yesterday_bars = []
     today_bars = []
     
     for bar in bars:
-        timestamp = bar.get("timestamp", "")
-        if date in timestamp:
-            today_bars.append(bar)
+        # ISO-8601 "YYYY-MM-DD" prefixes sort in calendar order, so the bar's date is
+        # compared as a string; timestamps without that prefix are skipped
+        bar_prefix = _date_of(bar.get("timestamp", ""))
+        if not bar_prefix:
+            continue
+        if bar_prefix < date:
+            yesterday_bars.append(bar)
         else:
-            # Check if it's from a day before the target date
-            try:
-                if "T" in timestamp:
-                    bar_dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-                else:
-                    bar_dt = datetime.strptime(timestamp[:10], "%Y-%m-%d")
-                
-                target_dt = datetime.strptime(date, "%Y-%m-%d")
-                
-                if bar_dt.date() < target_dt.date():
-                    yesterday_bars.append(bar)
-                elif bar_dt.date() > target_dt.date():
-                    today_bars.append(bar)
-            except:
-                continue
+            today_bars.append(bar)
     
     return yesterday_bars, today_bars
 
 
+@lru_cache(maxsize=4096)
+def _prev_trading_day(date_str: str) -> str:
+    # Previous weekday: go back 1 day, then past a weekend to Friday
+    # Simplified: holidays are not skipped (would need market calendar for production)
+    ordinal = date.fromisoformat(date_str).toordinal() - 1
+    # Skip weekends: ordinal 1 (0001-01-01) is a Monday, so Saturday is 5 and Sunday 6
+    weekday = (ordinal - 1) % 7
+    if weekday >= 5:
+        ordinal -= weekday - 4
+    yesterday_dt = date.fromordinal(ordinal)
+    return f"{yesterday_dt.year:04d}-{yesterday_dt.month:02d}-{yesterday_dt.day:02d}"
+
+
 def get_yesterday_full_day_bars(symbol: str, today_date: str) -> List[Dict[str, any]]:
     """
     Get full day 5-minute bars for yesterday (previous trading day).
@@ -1072,28 +1280,13 @@ def get_yesterday_full_day_bars(symbol: str, today_date: str) -> List[Dict[str,
         List of yesterday's 5-minute bars
     """
     try:
-        # Handle both date-only and datetime formats (including ISO 8601)
-        if 'T' in today_date or ' ' in today_date:
-            # Has time component - extract date part
-            try:
-                today_dt = datetime.fromisoformat(today_date)
-            except:
-                # Fallback: extract date part manually
-                date_part = today_date.split('T')[0] if 'T' in today_date else today_date.split()[0]
-                today_dt = datetime.strptime(date_part, "%Y-%m-%d")
-        else:
-            today_dt = datetime.strptime(today_date, "%Y-%m-%d")
-        # Go back to find the previous trading day
-        # Simplified: just go back 1 day (would need market calendar for production)
-        yesterday_dt = today_dt - timedelta(days=1)
-        # Skip weekends
-        while yesterday_dt.weekday() >= 5:
-            yesterday_dt -= timedelta(days=1)
-        
-        yesterday_str = yesterday_dt.strftime("%Y-%m-%d")
+        # Handle both date-only and datetime formats (including ISO 8601): the date is
+        # always the leading "YYYY-MM-DD", so slice it rather than parsing the time part
+        yesterday_str = _prev_trading_day(today_date[:10])
         
-        # This would call the Alpaca API tool
-        # For now, return empty list - the actual implementation would use MCP tool
+        # This would call the Alpaca API tool with yesterday_str
+        # For now, return empty list (yesterday_str is unused until then; computing it
+        # still reports a malformed today_date) - the actual implementation would use MCP tool
         # In practice, the agent would call get_5min_bars tool directly
         return []
         